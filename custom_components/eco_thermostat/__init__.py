@@ -1,32 +1,144 @@
 """Eco Thermostat Integration."""
 import logging
+
+import voluptuous as vol
+
+from homeassistant.components import persistent_notification
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.const import Platform
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    DATA_COORDINATOR,
+    DATA_STORE,
+    DATA_CONFIG,
+    CONF_COMMAND_RATE,
+    CONF_COMMAND_BURST,
+    DEFAULT_COMMAND_RATE,
+    DEFAULT_COMMAND_BURST,
+    SERVICE_PROFILE,
+    PROFILE_MODE_SAMPLING,
+    PROFILE_MODE_DETERMINISTIC,
+    DEFAULT_PROFILE_DURATION,
+    DEFAULT_PROFILE_TOP,
+)
+from .coordinator import EcoThermostatCoordinator
+from .profiler import IntegrationProfiler
+from .storage import RuntimeStore
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS = [Platform.CLIMATE]
+PLATFORMS = [Platform.CLIMATE, Platform.SENSOR]
+
+# Zones are set up in the UI; YAML only holds the domain-wide radio budget
+CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(DOMAIN): vol.Schema(
+            {
+                vol.Optional(CONF_COMMAND_RATE, default=DEFAULT_COMMAND_RATE): vol.All(
+                    vol.Coerce(float), vol.Range(min=0.1, max=100)
+                ),
+                vol.Optional(CONF_COMMAND_BURST, default=DEFAULT_COMMAND_BURST): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=100)
+                ),
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional("duration", default=DEFAULT_PROFILE_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=600)
+        ),
+        vol.Optional("mode", default=PROFILE_MODE_SAMPLING): vol.In(
+            [PROFILE_MODE_SAMPLING, PROFILE_MODE_DETERMINISTIC]
+        ),
+        vol.Optional("top", default=DEFAULT_PROFILE_TOP): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=200)
+        ),
+    }
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Load the saved zone state and register the domain services."""
+    store = RuntimeStore(hass)
+    await store.async_load()
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    domain_data[DATA_STORE] = store
+    domain_data[DATA_CONFIG] = config.get(DOMAIN) or {}
+
+    profiler = IntegrationProfiler(hass)
+
+    async def async_handle_profile(call: ServiceCall) -> ServiceResponse:
+        """Profile the integration and report the most expensive functions."""
+        report = await profiler.async_profile(
+            call.data["duration"], call.data["mode"], call.data["top"]
+        )
+        lines = [
+            f"- `{entry['function']}`: "
+            + ", ".join(f"{key} {value}" for key, value in entry.items() if key != "function")
+            for entry in report["top"][:10]
+        ]
+        persistent_notification.async_create(
+            hass,
+            f"Profil gespeichert unter `{report['file']}`.\n\n" + "\n".join(lines),
+            title="Eco Thermostat Profil",
+            notification_id=f"{DOMAIN}_profile",
+        )
+        return report
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_handle_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Eco Thermostat from a config entry."""
-    hass.data.setdefault(DOMAIN, {})
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    coordinator = domain_data.get(DATA_COORDINATOR)
+    if coordinator is None:
+        conf = domain_data.get(DATA_CONFIG, {})
+        coordinator = domain_data[DATA_COORDINATOR] = EcoThermostatCoordinator(
+            hass,
+            domain_data.get(DATA_STORE),
+            command_rate=conf.get(CONF_COMMAND_RATE, DEFAULT_COMMAND_RATE),
+            command_burst=conf.get(CONF_COMMAND_BURST, DEFAULT_COMMAND_BURST),
+        )
+    coordinator.async_add_zone(entry)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    entry.async_on_unload(entry.add_update_listener(async_entry_updated))
 
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        coordinator: EcoThermostatCoordinator = hass.data[DOMAIN][DATA_COORDINATOR]
+        coordinator.async_remove_zone(entry.entry_id)
+        if not coordinator.zones:
+            coordinator.async_shutdown()
+            hass.data[DOMAIN].pop(DATA_COORDINATOR)
+    return unload_ok
 
 
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+async def async_entry_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options in place, reload only if the entities changed."""
+    coordinator: EcoThermostatCoordinator = hass.data[DOMAIN][DATA_COORDINATOR]
+    zone = coordinator.zones.get(entry.entry_id)
+    if zone is not None and zone.data == dict(entry.data):
+        coordinator.async_apply_options(entry.entry_id)
+        return
+    await hass.config_entries.async_reload(entry.entry_id)
@@ -0,0 +1,63 @@
+"""Actuator layer for Eco Thermostat."""
+import logging
+from typing import Optional
+
+from homeassistant.core import HomeAssistant
+
+from .const import PRIORITY_NORMAL
+from .dispatcher import ServiceDispatcher
+from .pipeline import CommandPipeline
+from .state_cache import CachedState, StateCache
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _mode_reached(hvac_mode: str, state: CachedState) -> bool:
+    """Return True if the device reports the HVAC mode."""
+    return state.state == hvac_mode
+
+
+class Actuator:
+    """Command the HVAC mode of a heater/cooler and skip redundant calls."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entity_id: str,
+        dispatcher: ServiceDispatcher,
+        state_cache: StateCache,
+    ) -> None:
+        """Initialize the actuator."""
+        self.hass = hass
+        self.entity_id = entity_id
+        self.pipeline = CommandPipeline(
+            hass,
+            entity_id,
+            dispatcher,
+            state_cache,
+            "climate",
+            "set_hvac_mode",
+            "hvac_mode",
+            _mode_reached,
+        )
+
+        # Counters
+        self.commands_sent = 0
+        self.commands_suppressed = 0
+
+    @property
+    def failed(self) -> Optional[str]:
+        """Return the HVAC mode the device never confirmed."""
+        return self.pipeline.failed
+
+    async def async_set_hvac_mode(
+        self, hvac_mode: str, priority: int = PRIORITY_NORMAL
+    ) -> bool:
+        """Set the HVAC mode if it differs from the desired state."""
+        if not self.pipeline.async_request(hvac_mode, priority):
+            self.commands_suppressed += 1
+            return False
+
+        _LOGGER.debug("Queued %s -> %s", self.entity_id, hvac_mode)
+        self.commands_sent += 1
+        return True
@@ -13,23 +13,18 @@ from homeassistant.components.climate.const import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_state_change_event
 
 from .const import (
     DOMAIN,
+    DATA_COORDINATOR,
     CONF_NAME,
-    CONF_HEATER,
     CONF_COOLER,
-    CONF_HEATER_OFFSET_ENTITY,
-    CONF_COOLER_OFFSET_ENTITY,
-    CONF_AUTO_OFFSET_UPDATE,
-    DEFAULT_AUTO_OFFSET_UPDATE,
+    MIN_TEMP,
+    MAX_TEMP,
 )
-from .sensors import SensorManager
-from .control import ControlLogic
-from .offset_manager import OffsetManager
+from .coordinator import EcoThermostatCoordinator, Zone
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,6 +38,16 @@ PRESET_MAP = {
 
 REVERSE_PRESET_MAP = {v: k for k, v in PRESET_MAP.items()}
 
+# Entity attributes from the entry data, only change with a reload of the
+# entry; option-driven attributes are applied in place and stay recorded so
+# the history shows which settings were in effect
+STATIC_ATTRIBUTES = frozenset(
+    {
+        "heater_offset_entity",
+        "cooler_offset_entity",
+    }
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -50,24 +55,35 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Eco Thermostat climate platform."""
-    async_add_entities([EcoThermostatClimate(hass, entry)], True)
+    coordinator: EcoThermostatCoordinator = hass.data[DOMAIN][DATA_COORDINATOR]
+    zone = coordinator.zones[entry.entry_id]
+    # The coordinator evaluates the zone once it is armed
+    async_add_entities([EcoThermostatClimate(hass, entry, coordinator, zone)])
 
 
 class EcoThermostatClimate(ClimateEntity):
     """Eco Thermostat climate entity."""
 
-    _attr_should_poll = True
+    _attr_should_poll = False
     _attr_temperature_unit = UnitOfTemperature.CELSIUS
     _attr_target_temperature_step = 0.5
-    _attr_min_temp = 5.0
-    _attr_max_temp = 35.0
-
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+    _attr_min_temp = MIN_TEMP
+    _attr_max_temp = MAX_TEMP
+    _unrecorded_attributes = STATIC_ATTRIBUTES
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        coordinator: EcoThermostatCoordinator,
+        zone: Zone,
+    ) -> None:
         """Initialize the thermostat."""
         self.hass = hass
         self.entry = entry
+        self.coordinator = coordinator
+        self.zone = zone
         data = entry.data
-        options = entry.options
 
         # Entity attributes
         self._attr_name = data[CONF_NAME]
@@ -80,22 +96,10 @@ class EcoThermostatClimate(ClimateEntity):
             "sw_version": "1.0.0",
         }
 
-        # Initialize components
-        self.sensors = SensorManager(hass, data, options)
-        self.control = ControlLogic(
-            hass,
-            entry,
-            data[CONF_HEATER],
-            data.get(CONF_COOLER),
-        )
-        self.offset_manager = OffsetManager(
-            hass,
-            data[CONF_HEATER],
-            data.get(CONF_HEATER_OFFSET_ENTITY),
-            data.get(CONF_COOLER),
-            data.get(CONF_COOLER_OFFSET_ENTITY),
-            options.get(CONF_AUTO_OFFSET_UPDATE, DEFAULT_AUTO_OFFSET_UPDATE),
-        )
+        # Components are owned by the shared coordinator
+        self.sensors = zone.sensors
+        self.control = zone.control
+        self.offset_manager = zone.offset_manager
 
         # HVAC modes
         self._attr_hvac_modes = [HVACMode.OFF, HVACMode.HEAT]
@@ -116,6 +120,13 @@ class EcoThermostatClimate(ClimateEntity):
 
         self._enable_turn_on_off_backwards_compatibility = False
 
+        # Attribute dict, rebuilt only when one of its inputs changes
+        self._attributes: dict[str, Any] = {}
+        self._attributes_inputs: Optional[tuple] = None
+
+        # Rendered state of the last write
+        self._last_written: Optional[tuple] = None
+
     @property
     def current_temperature(self) -> Optional[float]:
         """Return the current temperature."""
@@ -147,9 +158,8 @@ class EcoThermostatClimate(ClimateEntity):
             _LOGGER.warning("Unsupported HVAC mode: %s", hvac_mode)
             return
 
-        self.control.hvac_mode = hvac_mode
-        await self.control.evaluate(self.sensors.current_temp)
-        self.async_write_ha_state()
+        self.control.set_hvac_mode(hvac_mode)
+        await self.zone.async_evaluate(read_inputs=False)
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         """Set new preset mode."""
@@ -160,34 +170,52 @@ class EcoThermostatClimate(ClimateEntity):
         # Convert HA preset to internal preset
         internal_preset = REVERSE_PRESET_MAP.get(preset_mode)
         if internal_preset:
-            self.control.preset_mode = internal_preset
-            self.control.target_temp = self.control.preset_temps[internal_preset]
-            await self.control.evaluate(self.sensors.current_temp)
-            self.async_write_ha_state()
+            self.control.set_target(self.control.preset_temps[internal_preset], internal_preset)
+            await self.zone.async_evaluate(read_inputs=False)
 
     async def async_set_temperature(self, **kwargs: Any) -> None:
         """Set new target temperature."""
         if temperature := kwargs.get(ATTR_TEMPERATURE):
-            self.control.target_temp = float(temperature)
-            await self.control.evaluate(self.sensors.current_temp)
-            self.async_write_ha_state()
+            self.control.set_target(float(temperature))
+            await self.zone.async_evaluate(read_inputs=False)
 
     async def async_turn_on(self) -> None:
         """Turn thermostat on (set to last used mode or heat)."""
         if self.control.hvac_mode == HVACMode.OFF:
-            self.control.hvac_mode = HVACMode.HEAT
-            await self.control.evaluate(self.sensors.current_temp)
-            self.async_write_ha_state()
+            self.control.set_hvac_mode(HVACMode.HEAT)
+            await self.zone.async_evaluate(read_inputs=False)
 
     async def async_turn_off(self) -> None:
         """Turn thermostat off."""
-        self.control.hvac_mode = HVACMode.OFF
-        await self.control.evaluate(self.sensors.current_temp)
-        self.async_write_ha_state()
+        self.control.set_hvac_mode(HVACMode.OFF)
+        await self.zone.async_evaluate(read_inputs=False)
+
+    def _dynamic_attribute_inputs(self) -> tuple:
+        """Return the values the extra attributes depend on besides the config."""
+        offset_manager = self.offset_manager
+        return tuple(
+            offset_manager.current_offset(entity) if entity else None
+            for entity in (
+                offset_manager.heater_offset_entity,
+                offset_manager.cooler_offset_entity,
+            )
+        ) + (
+            self.sensors.current_hum,
+            self.control.window_open if self.control.windows else None,
+            self.zone.generation,
+        )
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return extra state attributes."""
+        inputs = self._dynamic_attribute_inputs()
+        if inputs != self._attributes_inputs:
+            self._attributes_inputs = inputs
+            self._attributes = self._build_attributes()
+        return self._attributes
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Build the extra state attributes."""
         attrs = {
             "deadband": self.control.deadband,
             "min_run_seconds": self.control.min_run,
@@ -201,54 +229,51 @@ class EcoThermostatClimate(ClimateEntity):
             attrs["current_humidity"] = self.sensors.current_hum
 
         if self.control.windows:
-            attrs["window_open"] = self.control._is_window_open()
+            attrs["window_open"] = self.control.window_open
 
         # Show offset entities if configured
         if self.offset_manager.heater_offset_entity:
             attrs["heater_offset_entity"] = self.offset_manager.heater_offset_entity
             # Get current offset value
-            offset_state = self.hass.states.get(self.offset_manager.heater_offset_entity)
-            if offset_state:
-                try:
-                    attrs["heater_current_offset"] = float(offset_state.state)
-                except (ValueError, TypeError):
-                    pass
+            offset = self.offset_manager.current_offset(self.offset_manager.heater_offset_entity)
+            if offset is not None:
+                attrs["heater_current_offset"] = offset
 
         if self.offset_manager.cooler_offset_entity:
             attrs["cooler_offset_entity"] = self.offset_manager.cooler_offset_entity
             # Get current offset value
-            offset_state = self.hass.states.get(self.offset_manager.cooler_offset_entity)
-            if offset_state:
-                try:
-                    attrs["cooler_current_offset"] = float(offset_state.state)
-                except (ValueError, TypeError):
-                    pass
+            offset = self.offset_manager.current_offset(self.offset_manager.cooler_offset_entity)
+            if offset is not None:
+                attrs["cooler_current_offset"] = offset
 
         return attrs
 
+    @callback
+    def _async_write_if_changed(self) -> None:
+        """Write the state only if it differs from the last write."""
+        rendered = (
+            self.current_temperature,
+            self.target_temperature,
+            self.hvac_mode,
+            self.hvac_action,
+            self.preset_mode,
+            self._dynamic_attribute_inputs(),
+        )
+        if rendered == self._last_written:
+            self.zone.metrics.increment("state_writes_skipped")
+            return
+        self._last_written = rendered
+        self.zone.metrics.increment("state_writes")
+        self.async_write_ha_state()
+
     async def async_added_to_hass(self) -> None:
         """Run when entity is added to hass."""
         await super().async_added_to_hass()
 
-        # Track window state changes
-        if self.control.windows:
-
-            async def _on_window_change(event):
-                """Handle window state change."""
-                await self.async_update()
-
-            self.async_on_remove(
-                async_track_state_change_event(
-                    self.hass, self.control.windows, _on_window_change
-                )
-            )
+        # Render the result of every coordinator pass for this zone
+        self.async_on_remove(self.zone.async_add_listener(self._async_write_if_changed))
 
     async def async_update(self) -> None:
         """Update the entity."""
-        await self.sensors.update()
-        await self.control.evaluate(self.sensors.current_temp)
-
-        # Update local temperature offsets if enabled
-        await self.offset_manager.update_offsets(self.sensors.current_temp)
-
-        self.async_write_ha_state()
+        with self.zone.metrics.time("update"):
+            await self.coordinator.async_refresh([self.zone.entry_id])
@@ -21,6 +21,14 @@ from .const import (
     CONF_FROST_TEMP,
     CONF_SMOOTHING_ALPHA,
     CONF_AUTO_OFFSET_UPDATE,
+    CONF_SENSOR_AGGREGATION,
+    CONF_SENSOR_WEIGHTS,
+    CONF_OUTLIER_THRESHOLD,
+    CONF_STALE_SECONDS,
+    CONF_SCHEDULE,
+    AGGREGATION_MEDIAN,
+    AGGREGATION_TRIMMED_MEAN,
+    AGGREGATION_WEIGHTED_MEAN,
     CONF_PRESET_ECO,
     CONF_PRESET_COMFORT,
     CONF_PRESET_SLEEP,
@@ -34,11 +42,17 @@ from .const import (
     DEFAULT_SMOOTHING_ALPHA,
     DEFAULT_TEMP_OFFSET,
     DEFAULT_AUTO_OFFSET_UPDATE,
+    DEFAULT_SENSOR_AGGREGATION,
+    DEFAULT_SENSOR_WEIGHTS,
+    DEFAULT_OUTLIER_THRESHOLD,
+    DEFAULT_STALE_SECONDS,
+    DEFAULT_SCHEDULE,
     DEFAULT_PRESET_ECO,
     DEFAULT_PRESET_COMFORT,
     DEFAULT_PRESET_SLEEP,
     DEFAULT_PRESET_AWAY,
 )
+from .schedule import WeeklySchedule
 
 
 class EcoThermostatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -65,6 +79,11 @@ class EcoThermostatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_PRESET_SLEEP: DEFAULT_PRESET_SLEEP,
                     CONF_PRESET_AWAY: DEFAULT_PRESET_AWAY,
                     CONF_AUTO_OFFSET_UPDATE: DEFAULT_AUTO_OFFSET_UPDATE,
+                    CONF_SENSOR_AGGREGATION: DEFAULT_SENSOR_AGGREGATION,
+                    CONF_SENSOR_WEIGHTS: DEFAULT_SENSOR_WEIGHTS,
+                    CONF_OUTLIER_THRESHOLD: DEFAULT_OUTLIER_THRESHOLD,
+                    CONF_STALE_SECONDS: DEFAULT_STALE_SECONDS,
+                    CONF_SCHEDULE: DEFAULT_SCHEDULE,
                 },
             )
 
@@ -80,7 +99,8 @@ class EcoThermostatConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required(CONF_SENSOR_TEMP): selector.EntitySelector(
                     selector.EntitySelectorConfig(
                         domain="sensor",
-                        device_class="temperature"
+                        device_class="temperature",
+                        multiple=True
                     )
                 ),
                 vol.Optional(CONF_SENSOR_HUM): selector.EntitySelector(
@@ -134,10 +154,16 @@ class EcoThermostatOptionsFlow(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Manage options."""
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            try:
+                WeeklySchedule.parse(user_input.get(CONF_SCHEDULE, DEFAULT_SCHEDULE))
+            except ValueError:
+                errors[CONF_SCHEDULE] = "invalid_schedule"
+            else:
+                return self.async_create_entry(title="", data=user_input)
 
-        options = self.entry.options
+        options = {**self.entry.options, **(user_input or {})}
 
         data_schema = vol.Schema(
             {
@@ -209,6 +235,47 @@ class EcoThermostatOptionsFlow(config_entries.OptionsFlow):
                         mode=selector.NumberSelectorMode.SLIDER
                     )
                 ),
+                vol.Optional(
+                    CONF_SENSOR_AGGREGATION,
+                    default=options.get(CONF_SENSOR_AGGREGATION, DEFAULT_SENSOR_AGGREGATION)
+                ): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=[
+                            AGGREGATION_MEDIAN,
+                            AGGREGATION_TRIMMED_MEAN,
+                            AGGREGATION_WEIGHTED_MEAN,
+                        ],
+                        mode=selector.SelectSelectorMode.DROPDOWN
+                    )
+                ),
+                vol.Optional(
+                    CONF_SENSOR_WEIGHTS,
+                    default=options.get(CONF_SENSOR_WEIGHTS, DEFAULT_SENSOR_WEIGHTS)
+                ): selector.TextSelector(),
+                vol.Optional(
+                    CONF_OUTLIER_THRESHOLD,
+                    default=options.get(CONF_OUTLIER_THRESHOLD, DEFAULT_OUTLIER_THRESHOLD)
+                ): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=0.5,
+                        max=10.0,
+                        step=0.5,
+                        mode=selector.NumberSelectorMode.BOX,
+                        unit_of_measurement="°C"
+                    )
+                ),
+                vol.Optional(
+                    CONF_STALE_SECONDS,
+                    default=options.get(CONF_STALE_SECONDS, DEFAULT_STALE_SECONDS)
+                ): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=60,
+                        max=86400,
+                        step=60,
+                        mode=selector.NumberSelectorMode.BOX,
+                        unit_of_measurement="s"
+                    )
+                ),
                 vol.Optional(
                     CONF_PRESET_ECO,
                     default=options.get(CONF_PRESET_ECO, DEFAULT_PRESET_ECO)
@@ -261,7 +328,13 @@ class EcoThermostatOptionsFlow(config_entries.OptionsFlow):
                     CONF_AUTO_OFFSET_UPDATE,
                     default=options.get(CONF_AUTO_OFFSET_UPDATE, DEFAULT_AUTO_OFFSET_UPDATE)
                 ): selector.BooleanSelector(),
+                vol.Optional(
+                    CONF_SCHEDULE,
+                    default=options.get(CONF_SCHEDULE, DEFAULT_SCHEDULE)
+                ): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
+                ),
             }
         )
 
-        return self.async_show_form(step_id="init", data_schema=data_schema)
+        return self.async_show_form(step_id="init", data_schema=data_schema, errors=errors)
@@ -1,6 +1,9 @@
 """Konstanten für Eco Thermostat."""
 
 DOMAIN = "eco_thermostat"
+DATA_COORDINATOR = "coordinator"
+DATA_STORE = "store"
+DATA_CONFIG = "config"
 
 # Config Keys
 CONF_NAME = "name"
@@ -22,6 +25,16 @@ CONF_WINDOW_MODE = "window_mode"
 CONF_FROST_TEMP = "frost_temp"
 CONF_SMOOTHING_ALPHA = "smoothing_alpha"
 CONF_AUTO_OFFSET_UPDATE = "auto_offset_update"
+CONF_SENSOR_AGGREGATION = "sensor_aggregation"
+CONF_SENSOR_WEIGHTS = "sensor_weights"
+CONF_OUTLIER_THRESHOLD = "outlier_threshold"
+CONF_STALE_SECONDS = "stale_seconds"
+CONF_SCHEDULE = "schedule"
+
+# Sensor aggregation methods
+AGGREGATION_MEDIAN = "median"
+AGGREGATION_TRIMMED_MEAN = "trimmed_mean"
+AGGREGATION_WEIGHTED_MEAN = "weighted_mean"
 
 # Presets
 CONF_PRESET_ECO = "preset_eco"
@@ -38,10 +51,86 @@ DEFAULT_WINDOW_MODE = "frost"
 DEFAULT_FROST_TEMP = 5.0
 DEFAULT_SMOOTHING_ALPHA = 0.0
 DEFAULT_TEMP_OFFSET = 0.0
+DEFAULT_SENSOR_AGGREGATION = AGGREGATION_MEDIAN
+DEFAULT_SENSOR_WEIGHTS = ""
+DEFAULT_OUTLIER_THRESHOLD = 2.0
+DEFAULT_STALE_SECONDS = 3600
+DEFAULT_SCHEDULE = ""
+
+# Target temperature range of the climate entity and the schedule
+MIN_TEMP = 5.0
+MAX_TEMP = 35.0
 
 DEFAULT_PRESET_ECO = 18.0
 DEFAULT_PRESET_COMFORT = 22.0
 DEFAULT_PRESET_SLEEP = 19.0
 DEFAULT_PRESET_AWAY = 16.0
 DEFAULT_AUTO_OFFSET_UPDATE = True
-DEFAULT_AUTO_OFFSET_UPDATE = True
+
+# Push mode
+DEBOUNCE_SECONDS = 1.0
+SAFETY_POLL_SECONDS = 300
+
+# smoothing_alpha is the EMA weight per this many seconds (the former poll
+# interval); steps are weighted by the time elapsed since the last one
+SMOOTHING_REFERENCE_SECONDS = 30.0
+
+# After start (or setup) a zone with unknown inputs does not command devices
+STARTUP_GRACE_SECONDS = 120
+
+# Zones are armed in small batches with a jittered pause in between
+STARTUP_RAMP_BATCH = 4
+STARTUP_RAMP_INTERVAL = 1.0
+
+# Delay added to lockout wake-ups so the lockout has surely expired
+WAKEUP_MARGIN = 0.05
+
+# Service calls issued within this window are merged
+DISPATCH_DELAY = 0.2
+
+# Commands are confirmed from state changes, else re-sent with backoff
+COMMAND_CONFIRM_TIMEOUT = 30.0
+COMMAND_RETRIES = 3
+COMMAND_BACKOFF = 2.0
+
+# Domain-wide radio budget: commands per second with a burst allowance
+CONF_COMMAND_RATE = "command_rate"
+CONF_COMMAND_BURST = "command_burst"
+DEFAULT_COMMAND_RATE = 2.0
+DEFAULT_COMMAND_BURST = 5
+
+# Queued commands are sent lowest priority value first
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Concurrent fan-out
+GATHER_LIMIT = 8
+STEP_TIMEOUT = 10.0
+
+# Persisted runtime state, written at most this often
+STORAGE_KEY = "eco_thermostat.runtime"
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 30
+
+# Samples kept in the per-zone temperature history
+HISTORY_SIZE = 1440
+
+# Offset writes
+OFFSET_MIN_INTERVAL = 900
+OFFSET_HYSTERESIS = 0.3
+OFFSET_SETTLE_SECONDS = 300
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Profiling service
+SERVICE_PROFILE = "profile"
+PROFILE_MODE_SAMPLING = "sampling"
+PROFILE_MODE_DETERMINISTIC = "deterministic"
+PROFILE_SAMPLE_INTERVAL = 0.005
+DEFAULT_PROFILE_DURATION = 30
+DEFAULT_PROFILE_TOP = 20
@@ -1,8 +1,18 @@
 """Control logic for Eco Thermostat."""
 import time
 import logging
-from typing import Optional
+from typing import Any, Callable, Mapping, Optional
 from homeassistant.components.climate.const import HVACMode, HVACAction
+from homeassistant.core import CALLBACK_TYPE, HassJob, callback
+from homeassistant.helpers.event import async_call_later
+
+from .actuator import Actuator
+from .dispatcher import ServiceDispatcher
+from .state_cache import StateCache
+from .window_index import WindowIndex
+from .util import async_gather_bounded, monotonic_to_wall, wall_to_monotonic
+from .history import TemperatureHistory
+from .const import PRIORITY_NORMAL, PRIORITY_URGENT, WAKEUP_MARGIN
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -10,61 +20,200 @@ _LOGGER = logging.getLogger(__name__)
 class ControlLogic:
     """Control logic for heating/cooling with deadband and anti-short-cycling."""
 
-    def __init__(self, hass, entry, heater_entity: str, cooler_entity: Optional[str]):
+    def __init__(
+        self,
+        hass,
+        entry,
+        heater_entity: str,
+        cooler_entity: Optional[str],
+        dispatcher: ServiceDispatcher,
+        state_cache: StateCache,
+        window_index: Optional[WindowIndex] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         """Initialize control logic."""
         self.hass = hass
+        self.clock = clock
         self.entry = entry
         self.heater_entity = heater_entity
         self.cooler_entity = cooler_entity
+        self.state_cache = state_cache
+        self.heater = (
+            Actuator(hass, heater_entity, dispatcher, state_cache) if heater_entity else None
+        )
+        self.cooler = (
+            Actuator(hass, cooler_entity, dispatcher, state_cache) if cooler_entity else None
+        )
+
+        # Preset temperatures and control parameters
+        self.preset_temps: dict[str, float] = {}
+        self.preset_mode = "comfort"
+        self._window_was_open = False
+        self._saved_before_window: Optional[tuple] = None
+        self.apply_options(entry.options)
 
-        # Get options
-        options = entry.options
-
-        # Preset temperatures
-        self.preset_temps = {
-            "eco": float(options.get("preset_eco", 18.0)),
-            "comfort": float(options.get("preset_comfort", 22.0)),
-            "sleep": float(options.get("preset_sleep", 19.0)),
-            "away": float(options.get("preset_away", 16.0)),
-        }
+        # Window turn-off and frost protection go out before regular commands
+        self._priority = PRIORITY_NORMAL
 
         # Current state
         self.hvac_mode = HVACMode.HEAT
         self.hvac_action = HVACAction.IDLE
-        self.preset_mode = "comfort"
         self.target_temp = self.preset_temps["comfort"]
 
-        # Control parameters
-        self.deadband = float(options.get("deadband", 0.5))
-        self.frost_temp = float(options.get("frost_temp", 5.0))
-        self.window_mode = options.get("window_mode", "frost")
-        self.min_run = int(options.get("min_run_seconds", 180))
-        self.min_idle = int(options.get("min_idle_seconds", 180))
-
         # Window sensors
         data = entry.data
         self.windows = data.get("windows", [])
+        self.window_index = window_index
 
         # Internal state
         self._last_change = 0.0
         self._is_heating = False
         self._is_cooling = False
-        self._window_was_open = False
-        self._saved_before_window: Optional[tuple] = None
+
+        # Rolling temperature history, attached by the zone
+        self.history: Optional[TemperatureHistory] = None
+
+        # Called when a min run/idle lockout expires, set by the coordinator
+        self.wake_up: Optional[Callable[[], None]] = None
+        self._unsub_wakeup: Optional[CALLBACK_TYPE] = None
+        self._wakeup_job = HassJob(self._async_wakeup, cancel_on_shutdown=True)
+
+    def apply_options(self, options: Mapping[str, Any]) -> None:
+        """Swap in new option values, keeping the runtime state."""
+        previous = self.preset_temps.get(self.preset_mode)
+
+        self.preset_temps = {
+            "eco": float(options.get("preset_eco", 18.0)),
+            "comfort": float(options.get("preset_comfort", 22.0)),
+            "sleep": float(options.get("preset_sleep", 19.0)),
+            "away": float(options.get("preset_away", 16.0)),
+        }
+        self.deadband = float(options.get("deadband", 0.5))
+        self.frost_temp = float(options.get("frost_temp", 5.0))
+        self.window_mode = options.get("window_mode", "frost")
+        self.min_run = int(options.get("min_run_seconds", 180))
+        self.min_idle = int(options.get("min_idle_seconds", 180))
+
+        # A target that still equals its preset follows the new preset temperature
+        if previous is not None:
+            holding = self._window_was_open and self._saved_before_window
+            target = self._saved_before_window[1] if holding else self.target_temp
+            if target == previous:
+                self.set_target(self.preset_temps[self.preset_mode])
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the runtime state to persist (switch time in epoch seconds)."""
+        return {
+            "hvac_mode": self.hvac_mode,
+            "preset_mode": self.preset_mode,
+            "target_temp": self.target_temp,
+            "is_heating": self._is_heating,
+            "is_cooling": self._is_cooling,
+            "last_change": (
+                monotonic_to_wall(self._last_change, self.clock) if self._last_change > 0 else None
+            ),
+            "saved_before_window": (
+                list(self._saved_before_window)
+                if self._window_was_open and self._saved_before_window
+                else None
+            ),
+        }
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Restore the runtime state saved by as_dict."""
+        self.hvac_mode = HVACMode(data["hvac_mode"])
+        if data["preset_mode"] in self.preset_temps:
+            self.preset_mode = data["preset_mode"]
+        self.target_temp = float(data["target_temp"])
+        self._is_heating = bool(data["is_heating"])
+        self._is_cooling = bool(data["is_cooling"])
+        if data["last_change"] is not None:
+            # Keep it positive so the lockout checks still apply
+            self._last_change = max(wall_to_monotonic(data["last_change"], self.clock), 1e-6)
+        if data["saved_before_window"] is not None:
+            hvac_mode, target = data["saved_before_window"]
+            self._saved_before_window = (HVACMode(hvac_mode), float(target))
+            self._window_was_open = True
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        """Re-evaluate once a switching lockout has expired."""
+        if self.wake_up is None:
+            return
+        self._cancel_wakeup()
+        self._unsub_wakeup = async_call_later(
+            self.hass, max(delay, 0.0) + WAKEUP_MARGIN, self._wakeup_job
+        )
+
+    def _cancel_wakeup(self) -> None:
+        """Cancel a scheduled wake-up."""
+        if self._unsub_wakeup is not None:
+            self._unsub_wakeup()
+            self._unsub_wakeup = None
+
+    @callback
+    def _async_wakeup(self, _now) -> None:
+        """Request an evaluation at the end of a lockout."""
+        self._unsub_wakeup = None
+        if self.wake_up is not None:
+            self.wake_up()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel a pending wake-up."""
+        self._cancel_wakeup()
+
+    def set_hvac_mode(self, hvac_mode: HVACMode) -> None:
+        """Change the HVAC mode, kept for later while frost mode holds."""
+        if self._window_was_open and self._saved_before_window:
+            self._saved_before_window = (hvac_mode, self._saved_before_window[1])
+        else:
+            self.hvac_mode = hvac_mode
+
+    def set_target(self, target: float, preset: Optional[str] = None) -> None:
+        """Change the target (and preset), kept for later while frost mode holds."""
+        if preset is not None:
+            self.preset_mode = preset
+        if self._window_was_open and self._saved_before_window:
+            self._saved_before_window = (self._saved_before_window[0], target)
+        else:
+            self.target_temp = target
+
+    @property
+    def window_open(self) -> bool:
+        """Return True if any window of the zone is open."""
+        return self._is_window_open()
 
     def _is_window_open(self) -> bool:
         """Check if any window is open."""
         if not self.windows:
             return False
 
+        if self.window_index is not None:
+            return self.window_index.is_open(self.entry.entry_id)
+
         for window_entity in self.windows:
-            state = self.hass.states.get(window_entity)
-            if state and state.state == "on":
+            if self.state_cache.get(window_entity).state == "on":
                 return True
         return False
 
     async def evaluate(self, current_temp: Optional[float]) -> None:
         """Evaluate and control heating/cooling."""
+        # A still active lockout schedules a new wake-up below
+        self._cancel_wakeup()
+        await self._evaluate(current_temp)
+        await self._resend_failed()
+
+    async def _resend_failed(self) -> None:
+        """Start over with commands a device never confirmed and that still apply."""
+        for actuator in (self.heater, self.cooler):
+            if actuator and actuator.failed is not None:
+                _LOGGER.info("Re-sending %s to %s", actuator.failed, actuator.entity_id)
+                await actuator.async_set_hvac_mode(actuator.failed, self._priority)
+
+    async def _evaluate(self, current_temp: Optional[float]) -> None:
+        """Run the state machine for one reading."""
+        self._priority = PRIORITY_NORMAL
+
         if current_temp is None:
             self.hvac_action = HVACAction.IDLE
             await self._turn_off_all()
@@ -80,6 +229,8 @@ class ControlLogic:
                 self._window_was_open = True
                 _LOGGER.info("Window opened - applying window mode: %s", self.window_mode)
 
+            self._priority = PRIORITY_URGENT
+
             if self.window_mode == "off":
                 # Turn everything off
                 self.hvac_action = HVACAction.OFF
@@ -103,6 +254,9 @@ class ControlLogic:
                 self._saved_before_window = None
                 _LOGGER.info("Window closed - restoring previous mode")
 
+        if current_temp < self.frost_temp:
+            self._priority = PRIORITY_URGENT
+
         # Normal operation
         if self.hvac_mode == HVACMode.OFF:
             self.hvac_action = HVACAction.OFF
@@ -114,7 +268,7 @@ class ControlLogic:
 
     async def _control_heating(self, current_temp: float) -> None:
         """Control heating with hysteresis and anti-short-cycling."""
-        now = time.time()
+        now = self.clock()
         target_low = self.target_temp - self.deadband
         target_high = self.target_temp + self.deadband
 
@@ -123,10 +277,9 @@ class ControlLogic:
             if not self._is_heating:
                 # Check min idle time
                 if self._last_change > 0 and (now - self._last_change) < self.min_idle:
-                    _LOGGER.debug(
-                        "Anti-short-cycling: waiting %.0fs more",
-                        self.min_idle - (now - self._last_change)
-                    )
+                    remaining = self.min_idle - (now - self._last_change)
+                    _LOGGER.debug("Anti-short-cycling: waiting %.0fs more", remaining)
+                    self._schedule_wakeup(remaining)
                     self.hvac_action = HVACAction.IDLE
                     return
 
@@ -144,10 +297,9 @@ class ControlLogic:
             if self._is_heating:
                 # Check min run time
                 if (now - self._last_change) < self.min_run:
-                    _LOGGER.debug(
-                        "Min run time: heater running %.0fs more",
-                        self.min_run - (now - self._last_change)
-                    )
+                    remaining = self.min_run - (now - self._last_change)
+                    _LOGGER.debug("Min run time: heater running %.0fs more", remaining)
+                    self._schedule_wakeup(remaining)
                     self.hvac_action = HVACAction.HEATING
                     return
 
@@ -165,7 +317,7 @@ class ControlLogic:
 
     async def _control_cooling(self, current_temp: float) -> None:
         """Control cooling with hysteresis and anti-short-cycling."""
-        now = time.time()
+        now = self.clock()
         target_low = self.target_temp - self.deadband
         target_high = self.target_temp + self.deadband
 
@@ -174,10 +326,9 @@ class ControlLogic:
             if not self._is_cooling:
                 # Check min idle time
                 if self._last_change > 0 and (now - self._last_change) < self.min_idle:
-                    _LOGGER.debug(
-                        "Anti-short-cycling: waiting %.0fs more",
-                        self.min_idle - (now - self._last_change)
-                    )
+                    remaining = self.min_idle - (now - self._last_change)
+                    _LOGGER.debug("Anti-short-cycling: waiting %.0fs more", remaining)
+                    self._schedule_wakeup(remaining)
                     self.hvac_action = HVACAction.IDLE
                     return
 
@@ -195,10 +346,9 @@ class ControlLogic:
             if self._is_cooling:
                 # Check min run time
                 if (now - self._last_change) < self.min_run:
-                    _LOGGER.debug(
-                        "Min run time: cooler running %.0fs more",
-                        self.min_run - (now - self._last_change)
-                    )
+                    remaining = self.min_run - (now - self._last_change)
+                    _LOGGER.debug("Min run time: cooler running %.0fs more", remaining)
+                    self._schedule_wakeup(remaining)
                     self.hvac_action = HVACAction.COOLING
                     return
 
@@ -214,61 +364,43 @@ class ControlLogic:
             # In deadband - maintain current state
             self.hvac_action = HVACAction.COOLING if self._is_cooling else HVACAction.IDLE
 
+    @property
+    def command_stats(self) -> dict[str, int]:
+        """Return the number of sent and suppressed actuator commands."""
+        actuators = [a for a in (self.heater, self.cooler) if a]
+        return {
+            "commands_sent": sum(a.commands_sent for a in actuators),
+            "commands_suppressed": sum(a.commands_suppressed for a in actuators),
+            "commands_retried": sum(a.pipeline.retried for a in actuators),
+            "commands_failed": sum(a.pipeline.failures for a in actuators),
+        }
+
     async def _turn_on_heater(self) -> None:
         """Turn on the heater."""
-        if self.heater_entity:
-            try:
-                await self.hass.services.async_call(
-                    "climate",
-                    "set_hvac_mode",
-                    {"entity_id": self.heater_entity, "hvac_mode": "heat"},
-                    blocking=False,
-                )
-            except Exception as err:
-                _LOGGER.error("Failed to turn on heater: %s", err)
+        if self.heater:
+            await self.heater.async_set_hvac_mode(HVACMode.HEAT, self._priority)
 
     async def _turn_off_heater(self) -> None:
         """Turn off the heater."""
-        if self.heater_entity:
-            try:
-                await self.hass.services.async_call(
-                    "climate",
-                    "set_hvac_mode",
-                    {"entity_id": self.heater_entity, "hvac_mode": "off"},
-                    blocking=False,
-                )
-            except Exception as err:
-                _LOGGER.error("Failed to turn off heater: %s", err)
+        if self.heater:
+            await self.heater.async_set_hvac_mode(HVACMode.OFF, self._priority)
 
     async def _turn_on_cooler(self) -> None:
         """Turn on the cooler."""
-        if self.cooler_entity:
-            try:
-                await self.hass.services.async_call(
-                    "climate",
-                    "set_hvac_mode",
-                    {"entity_id": self.cooler_entity, "hvac_mode": "cool"},
-                    blocking=False,
-                )
-            except Exception as err:
-                _LOGGER.error("Failed to turn on cooler: %s", err)
+        if self.cooler:
+            await self.cooler.async_set_hvac_mode(HVACMode.COOL, self._priority)
 
     async def _turn_off_cooler(self) -> None:
         """Turn off the cooler."""
-        if self.cooler_entity:
-            try:
-                await self.hass.services.async_call(
-                    "climate",
-                    "set_hvac_mode",
-                    {"entity_id": self.cooler_entity, "hvac_mode": "off"},
-                    blocking=False,
-                )
-            except Exception as err:
-                _LOGGER.error("Failed to turn off cooler: %s", err)
+        if self.cooler:
+            await self.cooler.async_set_hvac_mode(HVACMode.OFF, self._priority)
 
     async def _turn_off_all(self) -> None:
         """Turn off all devices."""
-        await self._turn_off_heater()
-        await self._turn_off_cooler()
+        for result in await async_gather_bounded(
+            [self._turn_off_heater(), self._turn_off_cooler()]
+        ):
+            if isinstance(result, Exception):
+                _LOGGER.error("Failed to turn off device: %r", result)
         self._is_heating = False
         self._is_cooling = False
@@ -0,0 +1,635 @@
+"""Shared coordinator for all Eco Thermostat zones."""
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Callable, Iterable, Optional
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import (
+    async_track_state_change_event,
+    async_track_time_interval,
+)
+from homeassistant.helpers.start import async_at_started
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_HEATER,
+    CONF_COOLER,
+    CONF_SENSOR_HUM,
+    CONF_HEATER_OFFSET_ENTITY,
+    CONF_COOLER_OFFSET_ENTITY,
+    CONF_AUTO_OFFSET_UPDATE,
+    CONF_SCHEDULE,
+    DEFAULT_AUTO_OFFSET_UPDATE,
+    DEFAULT_COMMAND_BURST,
+    DEFAULT_SCHEDULE,
+    DEBOUNCE_SECONDS,
+    SAFETY_POLL_SECONDS,
+    STARTUP_GRACE_SECONDS,
+    STARTUP_RAMP_BATCH,
+    STARTUP_RAMP_INTERVAL,
+)
+from .sensors import SensorManager
+from .control import ControlLogic
+from .offset_manager import OffsetManager
+from .dispatcher import ServiceDispatcher
+from .window_index import WindowIndex
+from .state_cache import StateCache
+from .util import async_gather_bounded
+from .history import TemperatureHistory
+from .metrics import Metrics
+from .schedule import ScheduleEntry, ScheduleRunner, WeeklySchedule
+from .storage import RuntimeStore
+
+_LOGGER = logging.getLogger(__name__)
+
+# Attributes of the heater/cooler that feed into the evaluation
+DEVICE_INPUT_ATTRIBUTES = ("current_temperature",)
+
+
+class Zone:
+    """Runtime objects of a single thermostat zone."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        dispatcher: ServiceDispatcher,
+        state_cache: StateCache,
+        window_index: WindowIndex,
+    ) -> None:
+        """Initialize the zone."""
+        self.hass = hass
+        self.entry = entry
+        self.entry_id = entry.entry_id
+        data = entry.data
+        options = entry.options
+
+        # Entities the zone was built from; a change needs a reload
+        self.data = dict(data)
+
+        # Devices are only commanded once the coordinator armed the zone, and
+        # not for missing inputs until the grace period has passed
+        self.armed = False
+        self.grace_until = time.monotonic() + STARTUP_GRACE_SECONDS
+        # Bumped whenever options are applied in place
+        self.generation = 0
+
+        self.sensors = SensorManager(hass, data, options, state_cache)
+        self.control = ControlLogic(
+            hass,
+            entry,
+            data[CONF_HEATER],
+            data.get(CONF_COOLER),
+            dispatcher,
+            state_cache,
+            window_index,
+        )
+        self.offset_manager = OffsetManager(
+            hass,
+            data[CONF_HEATER],
+            data.get(CONF_HEATER_OFFSET_ENTITY),
+            data.get(CONF_COOLER),
+            data.get(CONF_COOLER_OFFSET_ENTITY),
+            options.get(CONF_AUTO_OFFSET_UPDATE, DEFAULT_AUTO_OFFSET_UPDATE),
+            dispatcher,
+            state_cache,
+        )
+
+        self.history = TemperatureHistory()
+        self.control.history = self.history
+
+        self.schedule = self._parse_schedule(options)
+        # Time of the last schedule transition applied to the zone
+        self.schedule_applied: Optional[datetime] = None
+
+        # Per-device command pipelines, confirmed from state changes
+        self.pipelines = {
+            actuator.entity_id: actuator.pipeline
+            for actuator in (self.control.heater, self.control.cooler)
+            if actuator
+        }
+        for entity, writer in self.offset_manager.writers.items():
+            self.pipelines[entity] = writer.pipeline
+
+        # Entities whose attributes matter in addition to their state
+        self.device_entities = {
+            entity for entity in (data[CONF_HEATER], data.get(CONF_COOLER)) if entity
+        }
+
+        self._listeners: list[CALLBACK_TYPE] = []
+
+        # Single-flight evaluation: triggers during a run collapse into one follow-up
+        self._running: Optional[asyncio.Future] = None
+        self._follow_up = False
+        self._read_inputs = False
+        self._changed: Optional[set[str]] = set()
+
+        # Called when the persisted state changed, set by the coordinator
+        self.persist: Optional[Callable[[], None]] = None
+        self._persisted: Optional[dict[str, Any]] = None
+
+        # Latency of each step of the last run in seconds
+        self.timings: dict[str, float] = {}
+        self.metrics = Metrics()
+        for pipeline in self.pipelines.values():
+            pipeline.metrics = self.metrics
+
+    def _parse_schedule(self, options) -> WeeklySchedule:
+        """Return the weekly schedule of the options."""
+        try:
+            return WeeklySchedule.parse(options.get(CONF_SCHEDULE, DEFAULT_SCHEDULE))
+        except ValueError as err:
+            _LOGGER.error("Ignoring invalid schedule of %s: %s", self.entry.title, err)
+            return WeeklySchedule([])
+
+    @callback
+    def apply_options(self, options) -> None:
+        """Swap new options into the running objects without losing their state."""
+        self.sensors.apply_options(options)
+        self.control.apply_options(options)
+        self.offset_manager.auto_update_enabled = options.get(
+            CONF_AUTO_OFFSET_UPDATE, DEFAULT_AUTO_OFFSET_UPDATE
+        )
+        self.schedule = self._parse_schedule(options)
+        self.generation += 1
+
+    @property
+    def input_entities(self) -> list[str]:
+        """Return all entities the evaluation depends on."""
+        # The snapshot, not entry.data: the entry may already hold the
+        # entities of the reloaded zone when this one is removed
+        data = self.data
+        entities = [
+            *self.sensors.sensor_temps,
+            data.get(CONF_SENSOR_HUM),
+            data[CONF_HEATER],
+            data.get(CONF_COOLER),
+            data.get(CONF_HEATER_OFFSET_ENTITY),
+            data.get(CONF_COOLER_OFFSET_ENTITY),
+            *self.control.windows,
+        ]
+        return list(dict.fromkeys(entity for entity in entities if entity))
+
+    async def _async_timed(self, step: str, aw) -> None:
+        """Await a step and record its latency."""
+        start = time.perf_counter()
+        try:
+            await aw
+        finally:
+            self.timings[step] = elapsed = time.perf_counter() - start
+            self.metrics.observe(step, elapsed)
+
+    @property
+    def counters(self) -> dict[str, int]:
+        """Return the event counters of the zone."""
+        writes = self.offset_manager.write_stats.values()
+        return {
+            "evaluations": self.metrics.counters["evaluations"],
+            "evaluations_coalesced": self.metrics.counters["coalesced"],
+            "evaluations_held": self.metrics.counters["held"],
+            "window_events": self.metrics.counters["window_events"],
+            "state_writes": self.metrics.counters["state_writes"],
+            "state_writes_skipped": self.metrics.counters["state_writes_skipped"],
+            **self.control.command_stats,
+            "offset_writes": sum(stats["writes_issued"] for stats in writes),
+            "offset_writes_suppressed": sum(stats["writes_suppressed"] for stats in writes),
+        }
+
+    async def async_evaluate(
+        self, changed: Optional[set[str]] = None, read_inputs: bool = True
+    ) -> None:
+        """Evaluate the zone, never concurrently with itself.
+
+        A trigger that arrives while an evaluation runs is merged into a single
+        follow-up run with the latest inputs; the caller waits for that run.
+        If read_inputs is False the sensors are not re-read (e.g. a new target).
+        """
+        self._follow_up = True
+        if read_inputs:
+            self._read_inputs = True
+            if changed is None or self._changed is None:
+                self._changed = None
+            else:
+                self._changed.update(changed)
+
+        if self._running is not None:
+            self.metrics.increment("coalesced")
+            await asyncio.shield(self._running)
+            return
+
+        self._running = self.hass.loop.create_future()
+        try:
+            while self._follow_up:
+                self._follow_up = False
+                read_inputs, self._read_inputs = self._read_inputs, False
+                changed, self._changed = self._changed, set()
+                if read_inputs:
+                    await self.async_update_inputs(changed)
+                await self.async_apply()
+        finally:
+            running, self._running = self._running, None
+            running.set_result(None)
+
+        # Entities refresh after every run, whether a pass or a service call started it
+        self.async_update_listeners()
+
+        if self.persist is not None:
+            state = self.as_dict()
+            if state != self._persisted:
+                self._persisted = state
+                self.persist()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the runtime state to persist across restarts."""
+        return {
+            "control": self.control.as_dict(),
+            "sensors": self.sensors.as_dict(),
+            "offsets": {
+                entity: writer.as_dict()
+                for entity, writer in self.offset_manager.writers.items()
+            },
+            "schedule_applied": (
+                self.schedule_applied.timestamp() if self.schedule_applied else None
+            ),
+        }
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """Restore the runtime state saved by as_dict."""
+        try:
+            self.control.restore(data["control"])
+            self.sensors.restore(data["sensors"])
+            for entity, writer in self.offset_manager.writers.items():
+                if entity in data["offsets"]:
+                    writer.restore(data["offsets"][entity])
+            # Missing in state saved before schedule transitions were tracked
+            if data.get("schedule_applied") is not None:
+                self.schedule_applied = dt_util.utc_from_timestamp(data["schedule_applied"])
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring saved state of %s: %r", self.entry.title, err)
+            return
+        self._persisted = data
+        _LOGGER.debug("Restored state of %s: %s", self.entry.title, data)
+
+    async def async_update_inputs(self, changed: Optional[set[str]] = None) -> None:
+        """Read the sensors of the zone (only the changed ones if given)."""
+        await self._async_timed("sensors", self.sensors.update(changed))
+
+    @property
+    def in_grace(self) -> bool:
+        """Return True while missing inputs are still expected to arrive."""
+        return time.monotonic() < self.grace_until
+
+    async def async_apply(self) -> None:
+        """Run control and offset updates concurrently."""
+        current_temp = self.sensors.current_temp
+        if not self.armed or (current_temp is None and self.in_grace):
+            # Leave the devices alone until the inputs are known
+            self.metrics.increment("held")
+            return
+        self.metrics.increment("evaluations")
+        results = await async_gather_bounded(
+            [
+                self._async_timed("control", self.control.evaluate(current_temp)),
+                self._async_timed("offsets", self.offset_manager.update_offsets(current_temp)),
+            ]
+        )
+        for step, result in zip(("control", "offsets"), results):
+            if isinstance(result, Exception):
+                _LOGGER.error(
+                    "Error in %s step of zone %s: %r",
+                    step,
+                    self.entry.title,
+                    result,
+                    exc_info=result,
+                )
+
+        if current_temp is not None:
+            self.history.append(time.time(), current_temp, self.control.hvac_action)
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        """Register a callback that renders the result of an evaluation."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel timers owned by the zone."""
+        self.control.async_shutdown()
+        self.offset_manager.async_shutdown()
+        for pipeline in self.pipelines.values():
+            pipeline.async_cancel()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify the entities of this zone."""
+        with self.metrics.time("render"):
+            for update_callback in list(self._listeners):
+                update_callback()
+
+
+class EcoThermostatCoordinator:
+    """Own all zones and evaluate them in one batched pass."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        store: Optional[RuntimeStore] = None,
+        command_rate: Optional[float] = None,
+        command_burst: int = DEFAULT_COMMAND_BURST,
+    ) -> None:
+        """Initialize the coordinator (no command rate means no radio budget)."""
+        self.hass = hass
+        self.zones: dict[str, Zone] = {}
+        self.store = store
+        if store is not None:
+            store.async_attach(self._collect_state)
+        self.dispatcher = ServiceDispatcher(hass, rate=command_rate, burst=command_burst)
+        self.windows = WindowIndex(hass)
+        self.states = StateCache(hass)
+        self.metrics = Metrics()
+        self.schedules = ScheduleRunner(hass, self._async_apply_schedule)
+
+        # entity_id -> zones that depend on it
+        self._entity_zones: dict[str, set[str]] = {}
+        self._unsub_entities: dict[str, CALLBACK_TYPE] = {}
+        self._unsub_poll: Optional[CALLBACK_TYPE] = None
+        self._unsub_started: Optional[CALLBACK_TYPE] = None
+        self._started = False
+        self._ramp: Optional[asyncio.Task] = None
+        self._dirty: set[str] = set()
+        self._changed: set[str] = set()
+
+        self._debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=DEBOUNCE_SECONDS,
+            immediate=False,
+            function=self._async_refresh_dirty,
+        )
+
+    @callback
+    def async_add_zone(self, entry: ConfigEntry) -> Zone:
+        """Create and register the zone of a config entry."""
+        zone = Zone(self.hass, entry, self.dispatcher, self.states, self.windows)
+        zone.control.wake_up = partial(self._async_wake_zone, zone.entry_id)
+        if self.store is not None:
+            saved = self.store.zone(zone.entry_id)
+            if saved is not None:
+                zone.restore(saved)
+            zone.persist = self.store.async_schedule_save
+        self.zones[zone.entry_id] = zone
+        self.windows.async_add_zone(zone.entry_id, zone.control.windows)
+
+        for entity_id in zone.input_entities:
+            self._entity_zones.setdefault(entity_id, set()).add(zone.entry_id)
+            if entity_id not in self._unsub_entities:
+                self._unsub_entities[entity_id] = async_track_state_change_event(
+                    self.hass, [entity_id], self._on_input_change
+                )
+
+        if zone.schedule:
+            self.schedules.async_add(zone.entry_id, zone.schedule, zone.schedule_applied)
+
+        if self._started:
+            zone.armed = True
+            self._async_wake_zone(zone.entry_id)
+        elif self._unsub_started is None:
+            self._unsub_started = async_at_started(self.hass, self._async_hass_started)
+
+        if self._unsub_poll is None:
+            # Slow safety net in case an event was missed
+            self._unsub_poll = async_track_time_interval(
+                self.hass,
+                self._async_safety_poll,
+                timedelta(seconds=SAFETY_POLL_SECONDS),
+            )
+
+        return zone
+
+    @callback
+    def _async_hass_started(self, _hass: HomeAssistant) -> None:
+        """Start the grace period and ramp up the zones once HA has started."""
+        self._unsub_started = None
+        self._started = True
+        grace_until = time.monotonic() + STARTUP_GRACE_SECONDS
+        for zone in self.zones.values():
+            zone.grace_until = grace_until
+        self._ramp = self.hass.async_create_task(self._async_ramp())
+
+    async def _async_ramp(self) -> None:
+        """Arm the zones in small batches so the devices are not hit at once."""
+        zone_ids = [zone_id for zone_id, zone in self.zones.items() if not zone.armed]
+        for index in range(0, len(zone_ids), STARTUP_RAMP_BATCH):
+            if index:
+                await asyncio.sleep(STARTUP_RAMP_INTERVAL * (1 + random.random()))
+            batch = [
+                zone_id
+                for zone_id in zone_ids[index : index + STARTUP_RAMP_BATCH]
+                if zone_id in self.zones
+            ]
+            for zone_id in batch:
+                self.zones[zone_id].armed = True
+            _LOGGER.debug("Armed zones %s", batch)
+            await self.async_refresh(batch)
+        self._ramp = None
+
+    @callback
+    def _collect_state(self) -> dict[str, dict[str, Any]]:
+        """Return the runtime state of all zones for the store."""
+        return {zone_id: zone.as_dict() for zone_id, zone in self.zones.items()}
+
+    @callback
+    def async_apply_options(self, entry_id: str) -> None:
+        """Apply changed options of a zone in place and re-evaluate it."""
+        zone = self.zones.get(entry_id)
+        if zone is None:
+            return
+        previous = zone.schedule
+        zone.apply_options(zone.entry.options)
+        self.schedules.async_remove(entry_id)
+        if zone.schedule.entries != previous.entries:
+            # Only a changed schedule overrides manual changes right away
+            zone.schedule_applied = None
+        if zone.schedule:
+            self.schedules.async_add(entry_id, zone.schedule, zone.schedule_applied)
+        _LOGGER.debug("Options of %s applied in place", zone.entry.title)
+
+        # Zones updated together (e.g. by a tuner) share one pass
+        self._dirty.add(entry_id)
+        self._debouncer.async_schedule_call()
+
+    @callback
+    def async_remove_zone(self, entry_id: str) -> None:
+        """Remove a zone and drop subscriptions no other zone needs."""
+        zone = self.zones.pop(entry_id, None)
+        if zone is None:
+            return
+
+        zone.async_shutdown()
+        if self.store is not None:
+            # Keep the latest state of the zone for its next setup
+            self.store.async_update_zone(entry_id, zone.as_dict())
+        self.schedules.async_remove(entry_id)
+        self._dirty.discard(entry_id)
+        self.windows.async_remove_zone(entry_id, zone.control.windows)
+        for entity_id in zone.input_entities:
+            zone_ids = self._entity_zones.get(entity_id)
+            if zone_ids is None:
+                continue
+            zone_ids.discard(entry_id)
+            if not zone_ids:
+                del self._entity_zones[entity_id]
+                self._unsub_entities.pop(entity_id)()
+                self.states.async_forget(entity_id)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel all timers and subscriptions."""
+        self._debouncer.async_cancel()
+        self.schedules.async_shutdown()
+        if self._unsub_started is not None:
+            self._unsub_started()
+            self._unsub_started = None
+        if self._ramp is not None:
+            self._ramp.cancel()
+            self._ramp = None
+        if self._unsub_poll is not None:
+            self._unsub_poll()
+            self._unsub_poll = None
+        for unsub in self._unsub_entities.values():
+            unsub()
+        self._unsub_entities.clear()
+        self._entity_zones.clear()
+        if self.dispatcher.pending:
+            self.hass.async_create_task(self.dispatcher.async_flush())
+
+    def _input_changed(self, event: Event) -> bool:
+        """Return True if a state change event affects the evaluation."""
+        old_state = event.data.get("old_state")
+        new_state = event.data.get("new_state")
+        if old_state is None or new_state is None:
+            return True
+        if old_state.state != new_state.state:
+            return True
+        return any(
+            old_state.attributes.get(attr) != new_state.attributes.get(attr)
+            for attr in DEVICE_INPUT_ATTRIBUTES
+        )
+
+    @callback
+    def _on_input_change(self, event: Event) -> None:
+        """Mark the affected zones dirty and schedule a debounced pass."""
+        entity_id = event.data["entity_id"]
+        new_state = event.data.get("new_state")
+        self.states.async_update(entity_id, new_state)
+        self.async_confirm_commands(entity_id)
+        if self.windows.async_update(entity_id, new_state):
+            for zone_id in self._entity_zones.get(entity_id, ()):
+                zone = self.zones.get(zone_id)
+                if zone is not None:
+                    zone.metrics.increment("window_events")
+        if not self._input_changed(event):
+            return
+        zone_ids = self._entity_zones.get(entity_id)
+        if zone_ids:
+            self._dirty.update(zone_ids)
+            self._changed.add(entity_id)
+            self._debouncer.async_schedule_call()
+
+    @callback
+    def async_confirm_commands(self, entity_id: str) -> None:
+        """Let the command pipelines of an entity check its new state."""
+        for zone_id in self._entity_zones.get(entity_id, ()):
+            zone = self.zones.get(zone_id)
+            if zone is None:
+                continue
+            pipeline = zone.pipelines.get(entity_id)
+            if pipeline is not None:
+                pipeline.async_observe()
+
+    @callback
+    def _async_wake_zone(self, zone_id: str) -> None:
+        """Evaluate a zone right when its switching lockout expires."""
+        if zone_id in self.zones:
+            self.hass.async_create_task(self.async_refresh([zone_id]))
+
+    @callback
+    def _async_apply_schedule(
+        self, zone_id: str, entry: ScheduleEntry, when: datetime
+    ) -> None:
+        """Apply a scheduled preset or target temperature and re-evaluate."""
+        zone = self.zones.get(zone_id)
+        if zone is None:
+            return
+        zone.schedule_applied = when
+        control = zone.control
+        if entry.preset is not None:
+            control.set_target(control.preset_temps[entry.preset], entry.preset)
+        else:
+            control.set_target(entry.temperature)
+        _LOGGER.debug("Schedule of %s applied: %s", zone.entry.title, entry)
+        self._async_wake_zone(zone_id)
+
+    async def _async_safety_poll(self, _now) -> None:
+        """Periodically re-evaluate all zones even if no input changed."""
+        await self.async_refresh()
+
+    async def _async_refresh_dirty(self) -> None:
+        """Evaluate the zones whose inputs changed."""
+        zone_ids, self._dirty = self._dirty, set()
+        changed, self._changed = self._changed, set()
+        await self.async_refresh(zone_ids, changed)
+
+    async def async_refresh(
+        self,
+        zone_ids: Optional[Iterable[str]] = None,
+        changed: Optional[set[str]] = None,
+    ) -> None:
+        """Evaluate the given zones (default: all) in one batched pass.
+
+        If changed is given, only those input entities are re-read.
+        """
+        if zone_ids is None:
+            zones = list(self.zones.values())
+        else:
+            zones = [self.zones[zone_id] for zone_id in zone_ids if zone_id in self.zones]
+        if not zones:
+            return
+
+        with self.metrics.time("pass"):
+            await self._async_refresh_zones(zones, changed)
+        self.metrics.increment("passes")
+
+    async def _async_refresh_zones(
+        self, zones: list[Zone], changed: Optional[set[str]]
+    ) -> None:
+        """Run one pass over the given zones."""
+        # Evaluate every zone, commands go out together
+        results = await async_gather_bounded(
+            [zone.async_evaluate(changed) for zone in zones], timeout=None
+        )
+        for zone, result in zip(zones, results):
+            if isinstance(result, Exception):
+                _LOGGER.error(
+                    "Error evaluating zone %s: %s", zone.entry.title, result, exc_info=result
+                )
+
+        # Send the merged commands of this pass right away
+        start = time.perf_counter()
+        await self.dispatcher.async_flush()
+        elapsed = time.perf_counter() - start
+        self.metrics.observe("dispatch", elapsed)
+        for zone in zones:
+            zone.metrics.observe("dispatch", elapsed)
@@ -0,0 +1,59 @@
+"""Diagnostics support for Eco Thermostat."""
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_COORDINATOR
+from .coordinator import EcoThermostatCoordinator
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: EcoThermostatCoordinator = hass.data[DOMAIN][DATA_COORDINATOR]
+    zone = coordinator.zones[entry.entry_id]
+    control = zone.control
+    dispatcher = coordinator.dispatcher
+
+    return {
+        "entry": {
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "state": {
+            "hvac_mode": control.hvac_mode,
+            "hvac_action": control.hvac_action,
+            "target_temperature": control.target_temp,
+            "current_temperature": zone.sensors.current_temp,
+            "window_open": control.window_open,
+            "preset_mode": control.preset_mode,
+            "armed": zone.armed,
+            "in_grace": zone.in_grace,
+            "next_schedule_change": coordinator.schedules.next_transition(entry.entry_id),
+        },
+        "zone": {
+            "counters": zone.counters,
+            "offset_writes": zone.offset_manager.write_stats,
+            "commands": {entity: pipeline.stats for entity, pipeline in zone.pipelines.items()},
+            "last_timings_ms": {
+                step: round(seconds * 1000, 3) for step, seconds in zone.timings.items()
+            },
+            "latency": zone.metrics.as_dict()["latency"],
+        },
+        "history": zone.history.as_dict(),
+        "coordinator": {
+            "zones": len(coordinator.zones),
+            "service_calls_queued": dispatcher.calls_queued,
+            "service_calls_dispatched": dispatcher.calls_dispatched,
+            "service_calls_pending": dispatcher.pending,
+            "service_calls_max_pending": dispatcher.max_pending,
+            "command_rate": dispatcher.rate,
+            "command_burst": dispatcher.burst,
+            "command_queue": dispatcher.metrics.as_dict(),
+            "state_saves_requested": coordinator.store.saves_requested if coordinator.store else 0,
+            "state_saves_written": coordinator.store.saves_written if coordinator.store else 0,
+            **coordinator.metrics.as_dict(),
+        },
+    }
@@ -0,0 +1,201 @@
+"""Batched service dispatch for Eco Thermostat."""
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DEFAULT_COMMAND_BURST, DISPATCH_DELAY, PRIORITY_NORMAL
+from .metrics import Metrics
+from .util import async_gather_bounded
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ServiceDispatcher:
+    """Collect service calls and merge identical ones into a single call.
+
+    With a rate, every entity call spends one token of a bucket shared by all
+    zones; calls beyond the budget wait in the queue, most urgent first, and a
+    newer call for the same entity replaces the waiting one.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        delay: float = DISPATCH_DELAY,
+        rate: Optional[float] = None,
+        burst: int = DEFAULT_COMMAND_BURST,
+    ) -> None:
+        """Initialize the dispatcher (no rate means no budget)."""
+        self.hass = hass
+        self.delay = delay
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+
+        # (domain, service, entity_id) -> service data without entity_id
+        self._pending: dict[tuple[str, str, str], dict[str, Any]] = {}
+        # (domain, service, entity_id) -> (priority, first queued at)
+        self._queued: dict[tuple[str, str, str], tuple[int, float]] = {}
+        # (domain, service, entity_id) -> called once the call left the queue
+        self._on_dispatched: dict[tuple[str, str, str], Callable[[], None]] = {}
+        self._unsub_flush: Optional[CALLBACK_TYPE] = None
+        self._flush_job = HassJob(self._async_flush_later, cancel_on_shutdown=True)
+
+        # Queue wait per entity call, coalesced, deferred and failed calls
+        self.metrics = Metrics()
+
+        # Counters
+        self.calls_queued = 0
+        self.calls_dispatched = 0
+        self.max_pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Return the number of queued entity calls."""
+        return len(self._pending)
+
+    @callback
+    def async_call(
+        self,
+        domain: str,
+        service: str,
+        data: dict[str, Any],
+        priority: int = PRIORITY_NORMAL,
+        on_dispatched: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Queue a service call for a single entity.
+
+        ``on_dispatched`` is called when the call was handed to Home Assistant
+        (or failed there), not when it was queued.
+        """
+        payload = dict(data)
+        entity_id = payload.pop("entity_id")
+        key = (domain, service, entity_id)
+
+        # Latest call wins if the same entity is addressed twice; it keeps
+        # its place in the queue and the most urgent priority
+        if key in self._pending:
+            self.metrics.increment("coalesced")
+        self._pending[key] = payload
+        queued = self._queued.get(key)
+        self._queued[key] = (
+            (min(priority, queued[0]), queued[1])
+            if queued is not None
+            else (priority, time.monotonic())
+        )
+        if on_dispatched is not None:
+            self._on_dispatched[key] = on_dispatched
+        else:
+            self._on_dispatched.pop(key, None)
+        self.calls_queued += 1
+        self.max_pending = max(self.max_pending, len(self._pending))
+
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(self.hass, self.delay, self._flush_job)
+
+    @callback
+    def async_discard(self, domain: str, service: str, entity_id: str) -> bool:
+        """Drop a queued call that is no longer wanted, return True if one was queued."""
+        key = (domain, service, entity_id)
+        self._queued.pop(key, None)
+        self._on_dispatched.pop(key, None)
+        return self._pending.pop(key, None) is not None
+
+    def is_queued(self, domain: str, service: str, entity_id: str) -> bool:
+        """Return True if a call for the entity still waits in the queue."""
+        return (domain, service, entity_id) in self._pending
+
+    @callback
+    def async_prioritize(
+        self, domain: str, service: str, entity_id: str, priority: int
+    ) -> None:
+        """Move a queued call up to a more urgent priority."""
+        key = (domain, service, entity_id)
+        queued = self._queued.get(key)
+        if queued is not None and priority < queued[0]:
+            self._queued[key] = (priority, queued[1])
+
+    async def _async_flush_later(self, _now) -> None:
+        """Flush the queue once the collection window has passed."""
+        self._unsub_flush = None
+        await self.async_flush()
+
+    def _take(self) -> dict[tuple[str, str, str], dict[str, Any]]:
+        """Remove the calls the budget allows from the queue, most urgent first."""
+        if self.rate is None:
+            keys = list(self._pending)
+        else:
+            now = time.monotonic()
+            self._tokens = min(
+                float(self.burst), self._tokens + (now - self._refilled) * self.rate
+            )
+            self._refilled = now
+            keys = sorted(self._pending, key=self._queued.__getitem__)[: int(self._tokens)]
+            self._tokens -= len(keys)
+
+        now = time.monotonic()
+        taken = {}
+        for key in keys:
+            taken[key] = self._pending.pop(key)
+            self.metrics.observe("queue_wait", now - self._queued.pop(key)[1])
+
+        if self._pending:
+            # Come back when the next token is available
+            self.metrics.increment("deferred", len(self._pending))
+            self._unsub_flush = async_call_later(
+                self.hass, (1 - self._tokens) / self.rate, self._flush_job
+            )
+        return taken
+
+    async def async_flush(self) -> None:
+        """Send the queued calls the budget allows, grouped by service and payload."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+
+        pending = self._take()
+        callbacks = {
+            key: on_dispatched
+            for key in pending
+            if (on_dispatched := self._on_dispatched.pop(key, None)) is not None
+        }
+        groups: dict[tuple, list[str]] = {}
+        for (domain, service, entity_id), payload in pending.items():
+            key = (domain, service, tuple(sorted(payload.items())))
+            groups.setdefault(key, []).append(entity_id)
+
+        calls = [
+            (domain, service, dict(payload), entity_ids)
+            for (domain, service, payload), entity_ids in groups.items()
+        ]
+        results = await async_gather_bounded(
+            self.hass.services.async_call(
+                domain,
+                service,
+                {
+                    "entity_id": entity_ids[0] if len(entity_ids) == 1 else entity_ids,
+                    **payload,
+                },
+                blocking=False,
+            )
+            for domain, service, payload, entity_ids in calls
+        )
+        for (domain, service, _payload, entity_ids), result in zip(calls, results):
+            if isinstance(result, Exception):
+                _LOGGER.error(
+                    "Failed to call %s.%s for %s: %r", domain, service, entity_ids, result
+                )
+                # Nothing went over the radio, a failing device must not drain the budget
+                if self.rate is not None:
+                    self._tokens = min(float(self.burst), self._tokens + len(entity_ids))
+                self.metrics.increment("failed", len(entity_ids))
+            else:
+                self.calls_dispatched += 1
+            for entity_id in entity_ids:
+                on_dispatched = callbacks.get((domain, service, entity_id))
+                if on_dispatched is not None:
+                    on_dispatched()
@@ -0,0 +1,176 @@
+"""Fixed-size temperature history for Eco Thermostat."""
+from array import array
+from collections import deque
+from typing import Iterator, Optional
+
+from .const import HISTORY_SIZE
+
+# Compact codes for the HVAC action of a sample
+ACTION_CODES = {"off": 0, "idle": 1, "heating": 2, "cooling": 3}
+ACTION_NAMES = {code: name for name, code in ACTION_CODES.items()}
+
+
+class TemperatureHistory:
+    """Ring buffer of (timestamp, temperature, action) with rolling statistics.
+
+    Appends and all statistics are O(1) (amortized). Sums are kept relative
+    to the first timestamp and rebuilt once per buffer length to bound
+    floating point drift.
+    """
+
+    def __init__(self, capacity: int = HISTORY_SIZE) -> None:
+        """Initialize the buffer."""
+        self.capacity = capacity
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._temps = array("d", bytes(8 * capacity))
+        self._actions = array("b", bytes(capacity))
+
+        # Number of samples ever appended; sample n lives at n % capacity
+        self._appended = 0
+        self._origin: Optional[float] = None
+        self._since_rebuild = 0
+        self._sum_t = self._sum_x = self._sum_tt = self._sum_tx = self._sum_xx = 0.0
+
+        # Monotonic deques of sample numbers for rolling min/max
+        self._min: deque[int] = deque()
+        self._max: deque[int] = deque()
+
+    def __len__(self) -> int:
+        """Return the number of stored samples."""
+        return min(self._appended, self.capacity)
+
+    @property
+    def _first(self) -> int:
+        """Return the sample number of the oldest stored sample."""
+        return self._appended - len(self)
+
+    def append(self, timestamp: float, temperature: float, action: str) -> None:
+        """Add a sample, evicting the oldest one if the buffer is full."""
+        if self._origin is None:
+            self._origin = timestamp
+
+        if self._appended >= self.capacity:
+            self._remove_sums(self._appended - self.capacity)
+
+        number = self._appended
+        slot = number % self.capacity
+        self._timestamps[slot] = timestamp
+        self._temps[slot] = temperature
+        self._actions[slot] = ACTION_CODES.get(str(action), 1)
+        self._appended += 1
+        self._add_sums(slot)
+
+        first = self._first
+        while self._min and self._min[0] < first:
+            self._min.popleft()
+        while self._max and self._max[0] < first:
+            self._max.popleft()
+        while self._min and self._temps[self._min[-1] % self.capacity] >= temperature:
+            self._min.pop()
+        while self._max and self._temps[self._max[-1] % self.capacity] <= temperature:
+            self._max.pop()
+        self._min.append(number)
+        self._max.append(number)
+
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.capacity:
+            self._rebuild_sums()
+
+    def _add_sums(self, slot: int) -> None:
+        """Add a stored sample to the running sums."""
+        t = self._timestamps[slot] - self._origin
+        x = self._temps[slot]
+        self._sum_t += t
+        self._sum_x += x
+        self._sum_tt += t * t
+        self._sum_tx += t * x
+        self._sum_xx += x * x
+
+    def _remove_sums(self, number: int) -> None:
+        """Remove a sample that is about to be evicted from the running sums."""
+        slot = number % self.capacity
+        t = self._timestamps[slot] - self._origin
+        x = self._temps[slot]
+        self._sum_t -= t
+        self._sum_x -= x
+        self._sum_tt -= t * t
+        self._sum_tx -= t * x
+        self._sum_xx -= x * x
+
+    def _rebuild_sums(self) -> None:
+        """Recompute the sums from scratch relative to the oldest sample."""
+        self._since_rebuild = 0
+        self._origin = self._timestamps[self._first % self.capacity]
+        self._sum_t = self._sum_x = self._sum_tt = self._sum_tx = self._sum_xx = 0.0
+        for number in range(self._first, self._appended):
+            self._add_sums(number % self.capacity)
+
+    def samples(self) -> Iterator[tuple[float, float, str]]:
+        """Iterate over the stored samples from oldest to newest."""
+        for number in range(self._first, self._appended):
+            slot = number % self.capacity
+            yield (
+                self._timestamps[slot],
+                self._temps[slot],
+                ACTION_NAMES[self._actions[slot]],
+            )
+
+    @property
+    def latest(self) -> Optional[tuple[float, float, str]]:
+        """Return the newest sample."""
+        if not self._appended:
+            return None
+        slot = (self._appended - 1) % self.capacity
+        return (
+            self._timestamps[slot],
+            self._temps[slot],
+            ACTION_NAMES[self._actions[slot]],
+        )
+
+    @property
+    def minimum(self) -> Optional[float]:
+        """Return the lowest stored temperature."""
+        return self._temps[self._min[0] % self.capacity] if self._min else None
+
+    @property
+    def maximum(self) -> Optional[float]:
+        """Return the highest stored temperature."""
+        return self._temps[self._max[0] % self.capacity] if self._max else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Return the mean stored temperature."""
+        count = len(self)
+        return self._sum_x / count if count else None
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Return the population variance of the stored temperatures."""
+        count = len(self)
+        if not count:
+            return None
+        mean = self._sum_x / count
+        return max(self._sum_xx / count - mean * mean, 0.0)
+
+    @property
+    def slope(self) -> Optional[float]:
+        """Return the least-squares temperature trend in °C per hour."""
+        count = len(self)
+        if count < 2:
+            return None
+        denominator = count * self._sum_tt - self._sum_t * self._sum_t
+        if denominator <= 0:
+            return None
+        return (count * self._sum_tx - self._sum_t * self._sum_x) / denominator * 3600
+
+    def as_dict(self) -> dict:
+        """Return the rolling statistics."""
+        return {
+            "samples": len(self),
+            "capacity": self.capacity,
+            "min": self.minimum,
+            "max": self.maximum,
+            "mean": self.mean,
+            "variance": self.variance,
+            "slope_per_hour": self.slope,
+        }
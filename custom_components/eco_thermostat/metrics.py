@@ -0,0 +1,101 @@
+"""Internal timing and counter metrics for Eco Thermostat."""
+import bisect
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .const import LATENCY_BUCKETS
+
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+
+    __slots__ = ("counts", "count", "total", "maximum")
+
+    def __init__(self) -> None:
+        """Initialize the histogram."""
+        # One bucket per bound plus overflow
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Record one duration."""
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Return the upper bucket bound below which the percentile falls."""
+        if not self.count:
+            return None
+        rank = percentile / 100 * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def as_dict(self) -> dict:
+        """Return a summary in milliseconds plus the raw buckets."""
+        def ms(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total / self.count) if self.count else None,
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "p99_ms": ms(self.percentile(99)),
+            "max_ms": ms(self.maximum),
+            "buckets_ms": {
+                **{
+                    f"le_{ms(bound)}": count
+                    for bound, count in zip(LATENCY_BUCKETS, self.counts)
+                },
+                "inf": self.counts[-1],
+            },
+        }
+
+
+class Metrics:
+    """Latency histograms per stage and event counters."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: Counter = Counter()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record the duration of a stage."""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Measure the duration of a block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        """Increase a counter."""
+        self.counters[counter] += amount
+
+    def as_dict(self) -> dict:
+        """Return all metrics."""
+        return {
+            "latency": {
+                stage: histogram.as_dict() for stage, histogram in self.histograms.items()
+            },
+            "counters": dict(self.counters),
+        }
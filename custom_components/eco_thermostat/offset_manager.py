@@ -1,12 +1,148 @@
 """Offset manager for automatic local temperature offset adjustment."""
 import logging
-from typing import Optional
+import time
+from typing import Any, Mapping, Optional
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    OFFSET_MIN_INTERVAL,
+    OFFSET_HYSTERESIS,
+    OFFSET_SETTLE_SECONDS,
+    PRIORITY_LOW,
+)
+from .dispatcher import ServiceDispatcher
+from .pipeline import CommandPipeline
+from .state_cache import CachedState, StateCache
+from .util import async_gather_bounded, monotonic_to_wall, wall_to_monotonic
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _offset_reached(value: float, state: CachedState) -> bool:
+    """Return True if the offset entity reports the value."""
+    return state.value is not None and round(state.value, 1) == round(value, 1)
+
+
+class OffsetWriter:
+    """Rate-limit and coalesce offset writes to a single device."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        offset_entity: str,
+        dispatcher: ServiceDispatcher,
+        state_cache: StateCache,
+        min_interval: float = OFFSET_MIN_INTERVAL,
+        hysteresis: float = OFFSET_HYSTERESIS,
+        settle: float = OFFSET_SETTLE_SECONDS,
+    ) -> None:
+        """Initialize the writer."""
+        self.hass = hass
+        self.offset_entity = offset_entity
+        self.pipeline = CommandPipeline(
+            hass,
+            offset_entity,
+            dispatcher,
+            state_cache,
+            offset_entity.split(".")[0],
+            "set_value",
+            "value",
+            _offset_reached,
+            priority=PRIORITY_LOW,
+        )
+        self.min_interval = min_interval
+        self.hysteresis = hysteresis
+        self.settle = settle
+
+        self._last_write: Optional[float] = None
+        self.last_value: Optional[float] = None
+        self._pending: Optional[float] = None
+        self._unsub_flush: Optional[CALLBACK_TYPE] = None
+
+        # Counters
+        self.writes_issued = 0
+        self.writes_suppressed = 0
+
+    @property
+    def settling(self) -> bool:
+        """Return True while the device has not reacted to the last write yet."""
+        return (
+            self._last_write is not None
+            and time.monotonic() - self._last_write < self.settle
+        )
+
+    @callback
+    def async_propose(self, new_offset: float, current_offset: float) -> bool:
+        """Request a new offset, return True if it was written right away."""
+        if self.settling:
+            # The measurement still reflects the previous offset
+            self.writes_suppressed += 1
+            return False
+
+        if abs(new_offset - current_offset) < self.hysteresis:
+            self._pending = None
+            self.writes_suppressed += 1
+            return False
+
+        now = time.monotonic()
+        if self._last_write is not None and now - self._last_write < self.min_interval:
+            # Coalesce to the latest value and write it once the interval passed
+            self._pending = new_offset
+            self.writes_suppressed += 1
+            if self._unsub_flush is None:
+                self._unsub_flush = async_call_later(
+                    self.hass,
+                    self.min_interval - (now - self._last_write),
+                    self._async_flush,
+                )
+            return False
+
+        self._write(new_offset)
+        return True
+
+    @callback
+    def _async_flush(self, _now) -> None:
+        """Write the latest pending offset."""
+        self._unsub_flush = None
+        if self._pending is not None:
+            self._write(self._pending)
+
+    @callback
+    def _write(self, value: float) -> None:
+        """Send an offset to the device."""
+        self._pending = None
+        self._last_write = time.monotonic()
+        self.last_value = value
+        self.writes_issued += 1
+        self.pipeline.async_request(value)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the last write to persist (time in epoch seconds)."""
+        return {
+            "value": self.last_value,
+            "written": (
+                monotonic_to_wall(self._last_write) if self._last_write is not None else None
+            ),
+        }
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Restore the last write so the rate limit spans restarts."""
+        self.last_value = data["value"]
+        if data["written"] is not None:
+            self._last_write = wall_to_monotonic(data["written"])
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel a scheduled write."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        self._pending = None
+        self.pipeline.async_cancel()
+
+
 class OffsetManager:
     """Manage automatic offset adjustments for thermostats."""
 
@@ -18,38 +154,79 @@ class OffsetManager:
         cooler_entity: Optional[str],
         cooler_offset_entity: Optional[str],
         auto_update_enabled: bool,
+        dispatcher: ServiceDispatcher,
+        state_cache: StateCache,
     ):
         """Initialize offset manager."""
         self.hass = hass
+        self.dispatcher = dispatcher
+        self.state_cache = state_cache
         self.heater_entity = heater_entity
         self.heater_offset_entity = heater_offset_entity
         self.cooler_entity = cooler_entity
         self.cooler_offset_entity = cooler_offset_entity
         self.auto_update_enabled = auto_update_enabled
 
+        self.writers = {
+            entity: OffsetWriter(hass, entity, dispatcher, state_cache)
+            for entity in (heater_offset_entity, cooler_offset_entity)
+            if entity
+        }
+
+    @property
+    def write_stats(self) -> dict[str, dict[str, int]]:
+        """Return issued and suppressed writes per offset entity."""
+        return {
+            entity: {
+                "writes_issued": writer.writes_issued,
+                "writes_suppressed": writer.writes_suppressed,
+            }
+            for entity, writer in self.writers.items()
+        }
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel scheduled offset writes."""
+        for writer in self.writers.values():
+            writer.async_cancel()
+
+    def current_offset(self, offset_entity: str) -> Optional[float]:
+        """Return the offset currently reported by an offset entity."""
+        return self.state_cache.value(offset_entity)
+
     async def update_offsets(self, sensor_temp: Optional[float]) -> None:
         """Update thermostat local temperature offsets based on sensor difference."""
         if not self.auto_update_enabled or sensor_temp is None:
             return
 
+        updates = []
+
         # Update heater offset
         if self.heater_entity and self.heater_offset_entity:
-            await self._update_device_offset(
-                self.heater_entity,
-                self.heater_offset_entity,
-                sensor_temp,
-                "Heater"
+            updates.append(
+                self._update_device_offset(
+                    self.heater_entity,
+                    self.heater_offset_entity,
+                    sensor_temp,
+                    "Heater"
+                )
             )
 
         # Update cooler offset
         if self.cooler_entity and self.cooler_offset_entity:
-            await self._update_device_offset(
-                self.cooler_entity,
-                self.cooler_offset_entity,
-                sensor_temp,
-                "Cooler"
+            updates.append(
+                self._update_device_offset(
+                    self.cooler_entity,
+                    self.cooler_offset_entity,
+                    sensor_temp,
+                    "Cooler"
+                )
             )
 
+        for result in await async_gather_bounded(updates):
+            if isinstance(result, Exception):
+                _LOGGER.error("Failed to update offset: %r", result)
+
     async def _update_device_offset(
         self,
         device_entity: str,
@@ -59,31 +236,25 @@ class OffsetManager:
     ) -> None:
         """Update offset for a specific device."""
         # Get current local temperature from the thermostat
-        thermostat_state = self.hass.states.get(device_entity)
-        if not thermostat_state:
+        thermostat_state = self.state_cache.get(device_entity)
+        if thermostat_state.state is None:
             _LOGGER.debug("%s entity %s not found", device_name, device_entity)
             return
 
-        local_temp = thermostat_state.attributes.get("current_temperature")
+        local_temp = thermostat_state.current_temperature
         if local_temp is None:
-            _LOGGER.debug("%s %s has no local temperature", device_name, device_entity)
-            return
-
-        try:
-            local_temp = float(local_temp)
-        except (ValueError, TypeError):
-            _LOGGER.warning("Invalid local temperature from %s: %s", device_entity, local_temp)
+            _LOGGER.debug("%s %s has no valid local temperature", device_name, device_entity)
             return
 
         # Get current offset value
-        offset_state = self.hass.states.get(offset_entity)
-        if not offset_state:
+        offset_state = self.state_cache.get(offset_entity)
+        if offset_state.state is None:
             _LOGGER.debug("Offset entity %s not found", offset_entity)
             return
 
-        try:
-            current_offset = float(offset_state.state)
-        except (ValueError, TypeError):
+        if offset_state.valid:
+            current_offset = offset_state.value
+        else:
             _LOGGER.warning("Invalid offset value from %s: %s", offset_entity, offset_state.state)
             current_offset = 0.0
 
@@ -93,33 +264,23 @@ class OffsetManager:
         temperature_difference = sensor_temp - local_temp
         new_offset = round(current_offset + temperature_difference, 1)
 
-        # Only update if difference is significant (> 0.1°C)
-        if abs(new_offset - current_offset) < 0.1:
+        # The writer applies hysteresis, rate limit and settle delay
+        if not self.writers[offset_entity].async_propose(new_offset, current_offset):
             _LOGGER.debug(
-                "%s offset unchanged: %.1f°C (diff: %.1f°C)",
+                "%s offset not written: %.1f°C -> %.1f°C (diff: %.1f°C)",
                 device_name,
                 current_offset,
+                new_offset,
                 temperature_difference
             )
             return
 
-        # Apply the new offset
-        try:
-            domain = offset_entity.split(".")[0]
-            await self.hass.services.async_call(
-                domain,
-                "set_value",
-                {"entity_id": offset_entity, "value": new_offset},
-                blocking=False,
-            )
-            _LOGGER.info(
-                "%s offset updated: %.1f°C -> %.1f°C (sensor: %.1f°C, local: %.1f°C, diff: %.1f°C)",
-                device_name,
-                current_offset,
-                new_offset,
-                sensor_temp,
-                local_temp,
-                temperature_difference
-            )
-        except Exception as err:
-            _LOGGER.error("Failed to update %s offset: %s", device_name, err)
+        _LOGGER.info(
+            "%s offset updated: %.1f°C -> %.1f°C (sensor: %.1f°C, local: %.1f°C, diff: %.1f°C)",
+            device_name,
+            current_offset,
+            new_offset,
+            sensor_temp,
+            local_temp,
+            temperature_difference
+        )
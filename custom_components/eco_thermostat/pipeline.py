@@ -0,0 +1,226 @@
+"""Confirmed per-device command pipeline for Eco Thermostat."""
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    COMMAND_BACKOFF,
+    COMMAND_CONFIRM_TIMEOUT,
+    COMMAND_RETRIES,
+    PRIORITY_NORMAL,
+)
+from .dispatcher import ServiceDispatcher
+from .metrics import Metrics
+from .state_cache import CachedState, StateCache
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CommandPipeline:
+    """Drive one device to the latest requested value until its state confirms it.
+
+    Only the newest value is kept: a request for another value supersedes the
+    command in flight (or drops it while it is still queued). Unconfirmed
+    commands are re-sent with exponential backoff; after the last retry the
+    value is remembered as failed until it is requested again.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entity_id: str,
+        dispatcher: ServiceDispatcher,
+        state_cache: StateCache,
+        domain: str,
+        service: str,
+        field: str,
+        matches: Callable[[Any, CachedState], bool],
+        timeout: float = COMMAND_CONFIRM_TIMEOUT,
+        retries: int = COMMAND_RETRIES,
+        backoff: float = COMMAND_BACKOFF,
+        priority: int = PRIORITY_NORMAL,
+    ) -> None:
+        """Initialize the pipeline."""
+        self.hass = hass
+        self.entity_id = entity_id
+        self.dispatcher = dispatcher
+        self.state_cache = state_cache
+        self.domain = domain
+        self.service = service
+        self.field = field
+        self._matches = matches
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.default_priority = priority
+        self.priority = priority
+
+        self.desired: Any = None
+        self.failed: Any = None
+        self.attempts = 0
+        self._sent_at: Optional[float] = None
+        self._unsub_timeout: Optional[CALLBACK_TYPE] = None
+        self._timeout_job = HassJob(self._async_timeout, cancel_on_shutdown=True)
+
+        # Confirmation latency, attached by the zone
+        self.metrics: Optional[Metrics] = None
+
+        # Counters
+        self.sent = 0
+        self.retried = 0
+        self.superseded = 0
+        self.confirmed = 0
+        self.failures = 0
+
+    @property
+    def in_flight(self) -> bool:
+        """Return True while a command waits for confirmation."""
+        return self.desired is not None
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the counters and the command in flight."""
+        return {
+            "in_flight": self.desired,
+            "attempts": self.attempts,
+            "failed": self.failed,
+            "sent": self.sent,
+            "retried": self.retried,
+            "superseded": self.superseded,
+            "confirmed": self.confirmed,
+            "failures": self.failures,
+        }
+
+    def _reached(self, value: Any) -> bool:
+        """Return True if the device reports the value."""
+        return self._matches(value, self.state_cache.get(self.entity_id))
+
+    @callback
+    def async_request(self, value: Any, priority: Optional[int] = None) -> bool:
+        """Request a value, return True if a command was sent."""
+        self.async_observe()
+        self.failed = None
+        if priority is None:
+            priority = self.default_priority
+
+        if value == self.desired:
+            # Same command still in flight, move it up if it became more urgent
+            if priority < self.priority:
+                self.priority = priority
+                self.dispatcher.async_prioritize(
+                    self.domain, self.service, self.entity_id, priority
+                )
+            return False
+
+        if self._reached(value):
+            if self.desired is None:
+                return False
+            if self.dispatcher.async_discard(self.domain, self.service, self.entity_id):
+                # The superseded command never left the queue
+                _LOGGER.debug("%s: dropped queued %s", self.entity_id, self.desired)
+                self.superseded += 1
+                self._clear()
+                return False
+
+        if self.desired is not None:
+            _LOGGER.debug("%s: %s superseded by %s", self.entity_id, self.desired, value)
+            self.superseded += 1
+
+        self.desired = value
+        self.priority = priority
+        self.attempts = 0
+        self._send()
+        return True
+
+    @callback
+    def async_observe(self) -> None:
+        """Confirm the command in flight if the device reports its value."""
+        if self.desired is None or not self._reached(self.desired):
+            return
+        self.confirmed += 1
+        if self.metrics is not None and self._sent_at is not None:
+            self.metrics.observe("confirm", time.monotonic() - self._sent_at)
+        _LOGGER.debug(
+            "%s confirmed %s after %d attempt(s)", self.entity_id, self.desired, self.attempts
+        )
+        self._clear()
+
+    @callback
+    def async_cancel(self) -> None:
+        """Forget the command in flight."""
+        self._clear()
+
+    def _send(self) -> None:
+        """Queue the desired value, the confirmation wait starts once it is sent."""
+        self.attempts += 1
+        self.sent += 1
+        self._sent_at = None
+        self._cancel_timeout()
+        self.dispatcher.async_call(
+            self.domain,
+            self.service,
+            {"entity_id": self.entity_id, self.field: self.desired},
+            self.priority,
+            self._async_dispatched,
+        )
+
+    @callback
+    def _async_dispatched(self) -> None:
+        """Wait for the confirmation of the command that just left the queue."""
+        if self.desired is None:
+            return
+        self._sent_at = time.monotonic()
+        self._cancel_timeout()
+        self._unsub_timeout = async_call_later(
+            self.hass, self.timeout * self.backoff ** (self.attempts - 1), self._timeout_job
+        )
+
+    @callback
+    def _async_timeout(self, _now) -> None:
+        """Retry an unconfirmed command or give up after the last attempt."""
+        self._unsub_timeout = None
+        self.async_observe()
+        if self.desired is None:
+            return
+
+        if self.dispatcher.is_queued(self.domain, self.service, self.entity_id):
+            # Still waiting for the budget; the wait restarts once it is sent
+            return
+
+        if self.attempts <= self.retries:
+            self.retried += 1
+            _LOGGER.debug(
+                "%s did not confirm %s, retrying (attempt %d)",
+                self.entity_id,
+                self.desired,
+                self.attempts + 1,
+            )
+            self._send()
+            return
+
+        self.failures += 1
+        self.failed = self.desired
+        _LOGGER.warning(
+            "%s did not confirm %s=%s after %d attempts",
+            self.entity_id,
+            self.field,
+            self.desired,
+            self.attempts,
+        )
+        self._clear()
+
+    def _cancel_timeout(self) -> None:
+        """Cancel the confirmation timeout."""
+        if self._unsub_timeout is not None:
+            self._unsub_timeout()
+            self._unsub_timeout = None
+
+    def _clear(self) -> None:
+        """Drop the command in flight."""
+        self._cancel_timeout()
+        self.desired = None
+        self.attempts = 0
+        self._sent_at = None
@@ -0,0 +1,175 @@
+"""On-demand profiling of the Eco Thermostat code paths."""
+import asyncio
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Optional
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import PROFILE_MODE_DETERMINISTIC, PROFILE_SAMPLE_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+# Only frames from this package are reported
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _is_own(filename: str) -> bool:
+    """Return True if a code object belongs to this integration."""
+    return filename.startswith(PACKAGE_DIR)
+
+
+def _label(filename: str, line: int, function: str) -> str:
+    """Return a short, stable name for a function."""
+    return f"{os.path.relpath(filename, PACKAGE_DIR)}:{line}:{function}"
+
+
+class StackSampler:
+    """Sample the stack of one thread from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL) -> None:
+        """Initialize the sampler."""
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._thread = threading.Thread(
+            target=self._run, name="eco_thermostat_profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the thread (blocking)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        """Collect samples until stopped."""
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            stack = []
+            own = False
+            while frame is not None:
+                code = frame.f_code
+                own = own or _is_own(code.co_filename)
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if own:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def write_collapsed(self, path: str) -> None:
+        """Write the samples in collapsed-stack format (flamegraph input)."""
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                names = ";".join(
+                    f"{os.path.basename(filename)}:{function}"
+                    for filename, _line, function in stack
+                )
+                file.write(f"{names} {count}\n")
+
+    def top(self, limit: int) -> list[dict[str, Any]]:
+        """Return the integration functions seen in the most samples."""
+        inclusive: Counter = Counter()
+        own_self: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own_frames = [frame for frame in stack if _is_own(frame[0])]
+            for frame in set(own_frames):
+                inclusive[frame] += count
+            own_self[own_frames[-1]] += count
+        return [
+            {
+                "function": _label(*frame),
+                "samples": count,
+                "self_samples": own_self[frame],
+                "share": round(count / self.samples, 4) if self.samples else 0.0,
+            }
+            for frame, count in inclusive.most_common(limit)
+        ]
+
+
+def _summarize_pstats(profiler: cProfile.Profile, path: str, limit: int) -> list[dict[str, Any]]:
+    """Write a pstats file and return the integration functions by cumulative time."""
+    profiler.dump_stats(path)
+    stats = pstats.Stats(profiler).stats
+    own = [
+        (key, value) for key, value in stats.items() if _is_own(key[0])
+    ]
+    own.sort(key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "function": _label(*key),
+            "calls": calls,
+            "total_ms": round(total * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        }
+        for key, (_primitive, calls, total, cumulative, _callers) in own[:limit]
+    ]
+
+
+class IntegrationProfiler:
+    """Run one profiling session at a time on the event loop thread."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the profiler."""
+        self.hass = hass
+        self._running = False
+
+    async def async_profile(self, duration: float, mode: str, limit: int) -> dict[str, Any]:
+        """Profile for a number of seconds and return the report."""
+        if self._running:
+            raise HomeAssistantError("A profiling session is already running")
+
+        self._running = True
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        try:
+            if mode == PROFILE_MODE_DETERMINISTIC:
+                path = self.hass.config.path(f"eco_thermostat_profile_{stamp}.pstats")
+                top = await self._async_deterministic(duration, path, limit)
+            else:
+                path = self.hass.config.path(f"eco_thermostat_profile_{stamp}.collapsed")
+                top = await self._async_sampling(duration, path, limit)
+        finally:
+            self._running = False
+
+        _LOGGER.info("Profile written to %s", path)
+        return {"file": path, "mode": mode, "duration": duration, "top": top}
+
+    async def _async_deterministic(self, duration: float, path: str, limit: int) -> list:
+        """Trace every call on the event loop thread."""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as err:
+            raise HomeAssistantError(f"Cannot start profiler: {err}") from err
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profiler.disable()
+        return await self.hass.async_add_executor_job(_summarize_pstats, profiler, path, limit)
+
+    async def _async_sampling(self, duration: float, path: str, limit: int) -> list:
+        """Sample the event loop thread from a background thread."""
+        sampler = StackSampler(threading.get_ident())
+        sampler.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            await self.hass.async_add_executor_job(sampler.stop)
+        await self.hass.async_add_executor_job(sampler.write_collapsed, path)
+        return sampler.top(limit)
@@ -0,0 +1,254 @@
+"""Weekly preset schedules for Eco Thermostat."""
+import heapq
+import itertools
+import logging
+import re
+from datetime import datetime, time, timedelta
+from typing import Callable, NamedTuple, Optional
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .const import MAX_TEMP, MIN_TEMP
+
+_LOGGER = logging.getLogger(__name__)
+
+PRESETS = ("eco", "comfort", "sleep", "away")
+
+# German and English day names, Monday = 0
+DAYS = {
+    "mo": 0, "mon": 0,
+    "di": 1, "tue": 1,
+    "mi": 2, "wed": 2,
+    "do": 3, "thu": 3,
+    "fr": 4, "fri": 4,
+    "sa": 5, "sat": 5,
+    "so": 6, "sun": 6,
+}
+ALL_DAYS = ("*", "täglich", "daily")
+
+_LINE = re.compile(r"^(?P<days>\S+)\s+(?P<hour>\d{1,2}):(?P<minute>\d{2})\s+(?P<value>\S+)$")
+
+
+class ScheduleEntry(NamedTuple):
+    """A transition at a minute of the week."""
+
+    week_minute: int
+    preset: Optional[str]
+    temperature: Optional[float]
+
+    @property
+    def weekday(self) -> int:
+        """Return the day of the week (Monday = 0)."""
+        return self.week_minute // 1440
+
+    @property
+    def time_of_day(self) -> time:
+        """Return the time of day."""
+        minute = self.week_minute % 1440
+        return time(minute // 60, minute % 60)
+
+
+def _parse_days(text: str) -> list[int]:
+    """Parse 'Mo-Fr', 'Sa,So' or 'täglich' into weekdays."""
+    text = text.lower()
+    if text in ALL_DAYS:
+        return list(range(7))
+    days: list[int] = []
+    for part in text.split(","):
+        start, _, end = part.partition("-")
+        if start not in DAYS or (end and end not in DAYS):
+            raise ValueError(f"Unknown day '{part}'")
+        first = DAYS[start]
+        last = DAYS[end] if end else first
+        days.extend((first + offset) % 7 for offset in range((last - first) % 7 + 1))
+    return days
+
+
+class WeeklySchedule:
+    """Sorted weekly transitions of one zone."""
+
+    def __init__(self, entries: list[ScheduleEntry]) -> None:
+        """Initialize the schedule."""
+        self.entries = sorted(entries)
+
+    @classmethod
+    def parse(cls, text: str) -> "WeeklySchedule":
+        """Parse one rule per line (or ';'), e.g. 'Mo-Fr 06:30 comfort'.
+
+        The value is a preset name or a target temperature.
+        """
+        entries: dict[int, ScheduleEntry] = {}
+        for raw in re.split(r"[\n;]", text or ""):
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            match = _LINE.match(line)
+            if match is None:
+                raise ValueError(f"Invalid rule '{line}'")
+            hour, minute = int(match["hour"]), int(match["minute"])
+            if hour > 23 or minute > 59:
+                raise ValueError(f"Invalid time in '{line}'")
+            value = match["value"].lower()
+            if value in PRESETS:
+                preset, temperature = value, None
+            else:
+                try:
+                    preset, temperature = None, float(value.replace(",", "."))
+                except ValueError as err:
+                    raise ValueError(f"Unknown preset or temperature in '{line}'") from err
+                if not MIN_TEMP <= temperature <= MAX_TEMP:
+                    raise ValueError(
+                        f"Temperature outside {MIN_TEMP}-{MAX_TEMP} °C in '{line}'"
+                    )
+            for day in _parse_days(match["days"]):
+                week_minute = day * 1440 + hour * 60 + minute
+                # A later rule for the same minute wins
+                entries[week_minute] = ScheduleEntry(week_minute, preset, temperature)
+        return cls(list(entries.values()))
+
+    def __bool__(self) -> bool:
+        """Return True if the schedule has any transition."""
+        return bool(self.entries)
+
+    @staticmethod
+    def _week_minute(moment: datetime) -> int:
+        """Return the minute of the week of a local time."""
+        return moment.weekday() * 1440 + moment.hour * 60 + moment.minute
+
+    def active_at(self, moment: datetime) -> ScheduleEntry:
+        """Return the transition in effect at a time."""
+        local = dt_util.as_local(moment)
+        current = self._week_minute(local)
+        active = self.entries[-1]
+        for entry in self.entries:
+            if entry.week_minute > current:
+                break
+            active = entry
+        return active
+
+    def last_until(self, moment: datetime) -> tuple[datetime, ScheduleEntry]:
+        """Return the latest transition at or before a time (in UTC)."""
+        local = dt_util.as_local(moment)
+        current = self._week_minute(local)
+        entry = self.active_at(moment)
+        days_back = local.weekday() - entry.weekday
+        if entry.week_minute > current:
+            days_back += 7
+        day = local.date() - timedelta(days=days_back)
+        when = datetime.combine(day, entry.time_of_day, tzinfo=local.tzinfo)
+        return dt_util.as_utc(when), entry
+
+    def next_after(self, moment: datetime) -> tuple[datetime, ScheduleEntry]:
+        """Return the next transition strictly after a time (in UTC)."""
+        local = dt_util.as_local(moment)
+        current = self._week_minute(local)
+        entry = next(
+            (entry for entry in self.entries if entry.week_minute > current),
+            self.entries[0],
+        )
+        days_ahead = entry.weekday - local.weekday()
+        if entry.week_minute <= current:
+            days_ahead += 7
+        day = local.date() + timedelta(days=days_ahead)
+        when = datetime.combine(day, entry.time_of_day, tzinfo=local.tzinfo)
+        return dt_util.as_utc(when), entry
+
+
+class ScheduleRunner:
+    """Drive the schedules of all zones from one timer on a shared heap."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        apply: Callable[[str, ScheduleEntry, datetime], None],
+    ) -> None:
+        """Initialize the runner."""
+        self.hass = hass
+        self._apply = apply
+        self._schedules: dict[str, WeeklySchedule] = {}
+
+        # (when, sequence, zone_id); entries not matching _next are stale
+        self._heap: list[tuple[datetime, int, str]] = []
+        self._next: dict[str, datetime] = {}
+        self._sequence = itertools.count()
+
+        self._unsub_timer: Optional[CALLBACK_TYPE] = None
+        self._armed_for: Optional[datetime] = None
+        self._job = HassJob(self._async_fire, cancel_on_shutdown=True)
+
+    @callback
+    def async_add(
+        self, zone_id: str, schedule: WeeklySchedule, applied: Optional[datetime] = None
+    ) -> None:
+        """Queue the next transition of a zone.
+
+        The transition in effect is applied first unless the zone already
+        applied it (or a later one) at ``applied``, so manual changes made
+        since then are kept.
+        """
+        self._schedules[zone_id] = schedule
+        now = dt_util.utcnow()
+        when, entry = schedule.last_until(now)
+        if applied is None or applied < when:
+            self._apply(zone_id, entry, when)
+        self._push(zone_id, now)
+        self._arm()
+
+    @callback
+    def async_remove(self, zone_id: str) -> None:
+        """Stop the schedule of a zone (its heap entries become stale)."""
+        self._schedules.pop(zone_id, None)
+        self._next.pop(zone_id, None)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel the timer."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._armed_for = None
+        self._heap.clear()
+        self._next.clear()
+        self._schedules.clear()
+
+    def next_transition(self, zone_id: str) -> Optional[datetime]:
+        """Return the next transition time of a zone."""
+        return self._next.get(zone_id)
+
+    def _push(self, zone_id: str, after: datetime) -> None:
+        """Queue the next transition of a zone."""
+        when, _entry = self._schedules[zone_id].next_after(after)
+        self._next[zone_id] = when
+        heapq.heappush(self._heap, (when, next(self._sequence), zone_id))
+
+    def _arm(self) -> None:
+        """Point the timer at the earliest valid transition."""
+        heap = self._heap
+        while heap and self._next.get(heap[0][2]) != heap[0][0]:
+            heapq.heappop(heap)
+        if not heap:
+            return
+        when = heap[0][0]
+        if self._armed_for is not None and self._armed_for <= when:
+            return
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+        self._armed_for = when
+        self._unsub_timer = async_track_point_in_utc_time(self.hass, self._job, when)
+
+    @callback
+    def _async_fire(self, now: datetime) -> None:
+        """Apply every due transition and re-arm for the next one."""
+        self._unsub_timer = None
+        self._armed_for = None
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            when, _sequence, zone_id = heapq.heappop(heap)
+            if self._next.get(zone_id) != when:
+                continue
+            schedule = self._schedules[zone_id]
+            self._apply(zone_id, schedule.active_at(when), when)
+            self._push(zone_id, when)
+        self._arm()
@@ -0,0 +1,129 @@
+"""Diagnostic sensors for Eco Thermostat."""
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, DATA_COORDINATOR
+from .coordinator import EcoThermostatCoordinator, Zone
+
+
+@dataclass(frozen=True)
+class EcoThermostatSensorDescription(SensorEntityDescription):
+    """Describe a diagnostic sensor and how to read it from the zone."""
+
+    value_fn: Callable[[Zone], Optional[float]] = lambda zone: None
+
+
+def _p95_ms(zone: Zone, stage: str) -> Optional[float]:
+    """Return the 95th percentile latency of a stage in milliseconds."""
+    histogram = zone.metrics.histograms.get(stage)
+    if histogram is None:
+        return None
+    value = histogram.percentile(95)
+    return None if value is None else round(value * 1000, 3)
+
+
+SENSORS = (
+    EcoThermostatSensorDescription(
+        key="evaluations",
+        translation_key="evaluations",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda zone: zone.counters["evaluations"],
+    ),
+    EcoThermostatSensorDescription(
+        key="commands_sent",
+        translation_key="commands_sent",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda zone: zone.counters["commands_sent"],
+    ),
+    EcoThermostatSensorDescription(
+        key="commands_suppressed",
+        translation_key="commands_suppressed",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda zone: zone.counters["commands_suppressed"],
+    ),
+    EcoThermostatSensorDescription(
+        key="offset_writes",
+        translation_key="offset_writes",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda zone: zone.counters["offset_writes"],
+    ),
+    EcoThermostatSensorDescription(
+        key="window_events",
+        translation_key="window_events",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda zone: zone.counters["window_events"],
+    ),
+    EcoThermostatSensorDescription(
+        key="evaluation_latency",
+        translation_key="evaluation_latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda zone: _p95_ms(zone, "control"),
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the diagnostic sensors of a zone."""
+    coordinator: EcoThermostatCoordinator = hass.data[DOMAIN][DATA_COORDINATOR]
+    zone = coordinator.zones[entry.entry_id]
+    async_add_entities(
+        EcoThermostatDiagnosticSensor(entry, zone, description) for description in SENSORS
+    )
+
+
+class EcoThermostatDiagnosticSensor(SensorEntity):
+    """Counter or latency of a zone, disabled by default."""
+
+    _attr_should_poll = False
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    entity_description: EcoThermostatSensorDescription
+
+    def __init__(
+        self,
+        entry: ConfigEntry,
+        zone: Zone,
+        description: EcoThermostatSensorDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        self.entity_description = description
+        self.zone = zone
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_{description.key}"
+        self._attr_device_info = {"identifiers": {(DOMAIN, entry.entry_id)}}
+        self._last_written: Optional[float] = None
+
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return the current value."""
+        return self.entity_description.value_fn(self.zone)
+
+    @callback
+    def _async_write_if_changed(self) -> None:
+        """Write the state only if the value changed."""
+        value = self.native_value
+        if value == self._last_written:
+            return
+        self._last_written = value
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        """Refresh after every coordinator pass of the zone."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.zone.async_add_listener(self._async_write_if_changed))
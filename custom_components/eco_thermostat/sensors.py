@@ -1,71 +1,213 @@
 """Sensor management for Eco Thermostat."""
 import logging
-from typing import Optional
+import statistics
+from datetime import datetime
+from typing import Any, Callable, Iterable, Mapping, Optional
 from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    AGGREGATION_MEDIAN,
+    AGGREGATION_TRIMMED_MEAN,
+    AGGREGATION_WEIGHTED_MEAN,
+    DEFAULT_SENSOR_AGGREGATION,
+    DEFAULT_OUTLIER_THRESHOLD,
+    DEFAULT_STALE_SECONDS,
+    SMOOTHING_REFERENCE_SECONDS,
+)
+from .state_cache import CachedState, StateCache
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def parse_weights(sensors: list[str], weights: str) -> dict[str, float]:
+    """Map a comma-separated weight list onto the sensors (default 1.0)."""
+    result = {sensor: 1.0 for sensor in sensors}
+    for sensor, weight in zip(sensors, (weights or "").split(",")):
+        try:
+            value = float(weight)
+        except ValueError:
+            continue
+        if value > 0:
+            result[sensor] = value
+    return result
+
+
 class SensorManager:
     """Manage temperature and humidity sensors with offset and smoothing."""
 
-    def __init__(self, hass: HomeAssistant, data: dict, options: dict) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        data: dict,
+        options: dict,
+        state_cache: StateCache,
+        clock: Callable[[], datetime] = dt_util.utcnow,
+    ) -> None:
         """Initialize sensor manager."""
         self.hass = hass
-        self.sensor_temp = data.get("sensor_temp")
+        self.clock = clock
+        self.state_cache = state_cache
+        sensor_temp = data.get("sensor_temp") or []
+        self.sensor_temps: list[str] = (
+            [sensor_temp] if isinstance(sensor_temp, str) else list(sensor_temp)
+        )
         self.sensor_hum = data.get("sensor_humidity")
         self.offset = float(data.get("temp_offset", 0.0))
-        self.alpha = float(options.get("smoothing_alpha", 0.0))
+        self.apply_options(options)
 
         self.current_temp: Optional[float] = None
         self.current_hum: Optional[float] = None
         self._smoothed_temp: Optional[float] = None
+        self._smoothed_at: Optional[datetime] = None
+
+        # sensor -> (value, cached state) of every valid temperature sensor
+        self._readings: dict[str, tuple[float, CachedState]] = {}
+
+    def apply_options(self, options: Mapping[str, Any]) -> None:
+        """Swap in new smoothing and fusion options, keeping the readings."""
+        self.alpha = float(options.get("smoothing_alpha", 0.0))
+
+        # Multi-sensor fusion
+        self.aggregation = options.get("sensor_aggregation", DEFAULT_SENSOR_AGGREGATION)
+        self.weights = parse_weights(self.sensor_temps, options.get("sensor_weights", ""))
+        self.outlier_threshold = float(
+            options.get("outlier_threshold", DEFAULT_OUTLIER_THRESHOLD)
+        )
+        self.stale_seconds = int(options.get("stale_seconds", DEFAULT_STALE_SECONDS))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the smoothing state to persist."""
+        return {
+            "smoothed_temp": (
+                round(self._smoothed_temp, 1) if self._smoothed_temp is not None else None
+            ),
+        }
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Continue smoothing from a saved value."""
+        if data["smoothed_temp"] is not None:
+            self._smoothed_temp = float(data["smoothed_temp"])
+
+    @property
+    def sensor_temp(self) -> Optional[str]:
+        """Return the primary temperature sensor."""
+        return self.sensor_temps[0] if self.sensor_temps else None
+
+    async def update(self, changed: Optional[Iterable[str]] = None) -> None:
+        """Update sensor values, only re-reading the changed sensors if given."""
+        if changed is None:
+            sensors = self.sensor_temps
+        else:
+            sensors = [sensor for sensor in self.sensor_temps if sensor in changed]
+        for sensor in sensors:
+            self._update_reading(sensor)
 
-    async def update(self) -> None:
-        """Update sensor values."""
         await self._update_temperature()
         await self._update_humidity()
 
+    def _update_reading(self, sensor: str) -> None:
+        """Refresh the reading of a single temperature sensor."""
+        state = self.state_cache.get(sensor)
+        if not state.available:
+            _LOGGER.debug("Temperature sensor %s unavailable", sensor)
+            self._readings.pop(sensor, None)
+            return
+
+        if not state.valid:
+            _LOGGER.warning("Invalid temperature value from %s: %s", sensor, state.state)
+            self._readings.pop(sensor, None)
+            return
+
+        self._readings[sensor] = (state.value, state)
+
+    def _aggregate(self) -> Optional[float]:
+        """Combine the current readings into one temperature."""
+        if not self._readings:
+            return None
+        if len(self._readings) == 1:
+            return next(iter(self._readings.values()))[0]
+
+        # Skip stale sensors unless all of them are stale; a sensor repeating
+        # its value only updates last_reported
+        now = self.clock()
+        readings = {
+            sensor: value
+            for sensor, (value, state) in self._readings.items()
+            if (last_reported := state.last_reported) is None
+            or (now - last_reported).total_seconds() <= self.stale_seconds
+        } or {sensor: value for sensor, (value, _) in self._readings.items()}
+
+        # Reject outliers relative to the median, unless none would be left
+        if len(readings) >= 3:
+            median = statistics.median(readings.values())
+            readings = {
+                sensor: value
+                for sensor, value in readings.items()
+                if abs(value - median) <= self.outlier_threshold
+            } or readings
+
+        values = sorted(readings.values())
+        if len(values) == 1:
+            return values[0]
+        if self.aggregation == AGGREGATION_TRIMMED_MEAN and len(values) >= 3:
+            return statistics.fmean(values[1:-1])
+        if self.aggregation == AGGREGATION_WEIGHTED_MEAN:
+            total = sum(self.weights[sensor] for sensor in readings)
+            return sum(value * self.weights[sensor] for sensor, value in readings.items()) / total
+        if self.aggregation == AGGREGATION_MEDIAN:
+            return statistics.median(values)
+        return statistics.fmean(values)
+
     async def _update_temperature(self) -> None:
-        """Update temperature sensor."""
-        if not self.sensor_temp:
+        """Update temperature from the fused sensors."""
+        if not self.sensor_temps:
             return
 
-        state = self.hass.states.get(self.sensor_temp)
-        if not state or state.state in ("unknown", "unavailable"):
-            _LOGGER.debug("Temperature sensor %s unavailable", self.sensor_temp)
+        raw_temp = self._aggregate()
+        if raw_temp is None:
             return
 
-        try:
-            raw_temp = float(state.state)
-            temp_with_offset = raw_temp + self.offset
-
-            # Apply EMA smoothing if enabled
-            if 0 < self.alpha <= 1.0:
-                if self._smoothed_temp is None:
-                    self._smoothed_temp = temp_with_offset
-                else:
-                    self._smoothed_temp = (
-                        self.alpha * temp_with_offset +
-                        (1 - self.alpha) * self._smoothed_temp
-                    )
-                self.current_temp = self._smoothed_temp
+        temp_with_offset = raw_temp + self.offset
+
+        # Apply EMA smoothing if enabled
+        if 0 < self.alpha <= 1.0:
+            now = self.clock()
+            if self._smoothed_temp is None:
+                self._smoothed_temp = temp_with_offset
             else:
-                self.current_temp = temp_with_offset
+                alpha = self._smoothing_weight(now)
+                self._smoothed_temp = (
+                    alpha * temp_with_offset +
+                    (1 - alpha) * self._smoothed_temp
+                )
+            self._smoothed_at = now
+            self.current_temp = self._smoothed_temp
+        else:
+            self.current_temp = temp_with_offset
+
+    def _smoothing_weight(self, now: datetime) -> float:
+        """Return the EMA weight for the time since the last step.
 
-        except (ValueError, TypeError) as err:
-            _LOGGER.warning("Invalid temperature value from %s: %s", self.sensor_temp, err)
+        Evaluations also run for humidity, device and window events, so the
+        weight depends on the elapsed time instead of the number of steps.
+        """
+        if self._smoothed_at is None:
+            return self.alpha
+        elapsed = max((now - self._smoothed_at).total_seconds(), 0.0)
+        return 1 - (1 - self.alpha) ** (elapsed / SMOOTHING_REFERENCE_SECONDS)
 
     async def _update_humidity(self) -> None:
         """Update humidity sensor."""
         if not self.sensor_hum:
             return
 
-        state = self.hass.states.get(self.sensor_hum)
-        if not state or state.state in ("unknown", "unavailable"):
+        state = self.state_cache.get(self.sensor_hum)
+        if not state.available:
             return
 
-        try:
-            self.current_hum = float(state.state)
-        except (ValueError, TypeError) as err:
-            _LOGGER.warning("Invalid humidity value from %s: %s", self.sensor_hum, err)
+        if not state.valid:
+            _LOGGER.warning("Invalid humidity value from %s: %s", self.sensor_hum, state.state)
+            return
+
+        self.current_hum = state.value
@@ -0,0 +1,87 @@
+"""Parsed entity state cache for Eco Thermostat."""
+from datetime import datetime
+from typing import Any, Optional
+
+from homeassistant.core import HomeAssistant, State, callback
+
+
+def _parse_float(value: Any) -> Optional[float]:
+    """Convert a state value to float, None if not numeric."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class CachedState:
+    """Parsed view of an entity state."""
+
+    __slots__ = ("state", "value", "current_temperature", "last_updated", "_source")
+
+    def __init__(self, state: Optional[State]) -> None:
+        """Parse a state once."""
+        self._source = state
+        if state is None:
+            self.state: Optional[str] = None
+            self.value: Optional[float] = None
+            self.current_temperature: Optional[float] = None
+            self.last_updated: Optional[datetime] = None
+            return
+
+        self.state = state.state
+        self.value = _parse_float(state.state)
+        self.current_temperature = _parse_float(
+            state.attributes.get("current_temperature")
+        )
+        self.last_updated = state.last_updated
+
+    @property
+    def last_reported(self) -> Optional[datetime]:
+        """Return when the entity last reported, also without a state change.
+
+        Home Assistant updates this on the live state object without firing
+        state_changed, so it is read through instead of parsed once.
+        """
+        return self._source.last_reported if self._source is not None else None
+
+    @property
+    def available(self) -> bool:
+        """Return True if the entity exists and reports a state."""
+        return self.state is not None and self.state not in ("unknown", "unavailable")
+
+    @property
+    def valid(self) -> bool:
+        """Return True if the state is a number."""
+        return self.value is not None
+
+
+class StateCache:
+    """Cache parsed states, refreshed only from state-change events."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self._entries: dict[str, CachedState] = {}
+
+    def get(self, entity_id: str) -> CachedState:
+        """Return the parsed state of an entity."""
+        entry = self._entries.get(entity_id)
+        if entry is None:
+            entry = self._entries[entity_id] = CachedState(self.hass.states.get(entity_id))
+        return entry
+
+    def value(self, entity_id: str) -> Optional[float]:
+        """Return the numeric state of an entity."""
+        return self.get(entity_id).value
+
+    @callback
+    def async_update(self, entity_id: str, new_state: Optional[State]) -> None:
+        """Store the new state of an entity."""
+        self._entries[entity_id] = CachedState(new_state)
+
+    @callback
+    def async_forget(self, entity_id: str) -> None:
+        """Drop an entity that is no longer tracked."""
+        self._entries.pop(entity_id, None)
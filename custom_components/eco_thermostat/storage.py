@@ -0,0 +1,77 @@
+"""Persisted runtime state of the Eco Thermostat zones."""
+import logging
+from typing import Any, Callable, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import STORAGE_KEY, STORAGE_SAVE_DELAY, STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RuntimeStore:
+    """Keep the runtime state of all zones in one store with batched writes.
+
+    A save request arms one delayed write; further requests until it runs are
+    free, and the state of every zone is collected when the file is written.
+    """
+
+    def __init__(self, hass: HomeAssistant, delay: float = STORAGE_SAVE_DELAY) -> None:
+        """Initialize the store."""
+        self.hass = hass
+        self.delay = delay
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._zones: dict[str, dict[str, Any]] = {}
+        self._collect: Optional[Callable[[], dict[str, dict[str, Any]]]] = None
+        self._save_pending = False
+
+        # Counters
+        self.saves_requested = 0
+        self.saves_written = 0
+
+    async def async_load(self) -> None:
+        """Load the saved state of all zones."""
+        data = await self._store.async_load()
+        if data is not None:
+            self._zones = data.get("zones", {})
+
+    def zone(self, zone_id: str) -> Optional[dict[str, Any]]:
+        """Return the saved state of a zone."""
+        return self._zones.get(zone_id)
+
+    @callback
+    def async_update_zone(self, zone_id: str, state: dict[str, Any]) -> None:
+        """Store the state of a zone that is no longer loaded."""
+        self._zones[zone_id] = state
+        self.async_schedule_save()
+
+    @callback
+    def async_attach(self, collect: Callable[[], dict[str, dict[str, Any]]]) -> None:
+        """Set the function returning the current state of the loaded zones."""
+        self._collect = collect
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Write the state of all zones after the save delay."""
+        self.saves_requested += 1
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(self._data_to_save, self.delay)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Merge the current zone states into the saved ones."""
+        self._save_pending = False
+        self.saves_written += 1
+        if self._collect is not None:
+            self._zones.update(self._collect())
+
+        # Drop zones whose config entry was deleted
+        self._zones = {
+            zone_id: state
+            for zone_id, state in self._zones.items()
+            if self.hass.config_entries.async_get_entry(zone_id) is not None
+        }
+        return {"zones": self._zones}
@@ -0,0 +1,36 @@
+"""Helpers for Eco Thermostat."""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from .const import GATHER_LIMIT, STEP_TIMEOUT
+
+
+def monotonic_to_wall(value: float, clock: Callable[[], float] = time.monotonic) -> int:
+    """Convert a reading of a monotonic clock to epoch seconds."""
+    return round(time.time() - (clock() - value))
+
+
+def wall_to_monotonic(value: float, clock: Callable[[], float] = time.monotonic) -> float:
+    """Convert epoch seconds to a reading of a monotonic clock."""
+    return clock() - (time.time() - value)
+
+
+async def async_gather_bounded(
+    aws: Iterable[Awaitable[Any]],
+    limit: int = GATHER_LIMIT,
+    timeout: Optional[float] = STEP_TIMEOUT,
+) -> list[Any]:
+    """Run awaitables concurrently with a concurrency cap and per-call timeout.
+
+    Exceptions (including TimeoutError) are returned in place of results.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _run(aw: Awaitable[Any]) -> Any:
+        async with semaphore:
+            if timeout is None:
+                return await aw
+            return await asyncio.wait_for(aw, timeout)
+
+    return await asyncio.gather(*(_run(aw) for aw in aws), return_exceptions=True)
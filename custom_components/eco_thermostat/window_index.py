@@ -0,0 +1,69 @@
+"""Incremental open-window index for Eco Thermostat."""
+from typing import Iterable, Optional
+
+from homeassistant.core import HomeAssistant, State, callback
+
+
+def _is_open(state: Optional[State]) -> bool:
+    """Return True if a window state means open."""
+    return state is not None and state.state == "on"
+
+
+class WindowIndex:
+    """Keep an open-window count per zone, updated from state changes."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the index."""
+        self.hass = hass
+
+        # window entity -> open
+        self._open: dict[str, bool] = {}
+        # window entity -> zones that reference it
+        self._zones: dict[str, set[str]] = {}
+        # zone -> number of open windows
+        self._open_count: dict[str, int] = {}
+
+    @callback
+    def async_add_zone(self, zone_id: str, windows: Iterable[str]) -> None:
+        """Register the windows of a zone."""
+        count = 0
+        for window in dict.fromkeys(windows):
+            self._zones.setdefault(window, set()).add(zone_id)
+            if window not in self._open:
+                self._open[window] = _is_open(self.hass.states.get(window))
+            count += self._open[window]
+        self._open_count[zone_id] = count
+
+    @callback
+    def async_remove_zone(self, zone_id: str, windows: Iterable[str]) -> None:
+        """Forget the windows of a zone."""
+        self._open_count.pop(zone_id, None)
+        for window in dict.fromkeys(windows):
+            zone_ids = self._zones.get(window)
+            if zone_ids is None:
+                continue
+            zone_ids.discard(zone_id)
+            if not zone_ids:
+                del self._zones[window]
+                del self._open[window]
+
+    @callback
+    def async_update(self, entity_id: str, new_state: Optional[State]) -> bool:
+        """Apply a window state change, return True if open/closed flipped."""
+        zone_ids = self._zones.get(entity_id)
+        if zone_ids is None:
+            return False
+
+        is_open = _is_open(new_state)
+        if is_open == self._open[entity_id]:
+            return False
+
+        self._open[entity_id] = is_open
+        delta = 1 if is_open else -1
+        for zone_id in zone_ids:
+            self._open_count[zone_id] += delta
+        return True
+
+    def is_open(self, zone_id: str) -> bool:
+        """Return True if any window of the zone is open."""
+        return self._open_count.get(zone_id, 0) > 0
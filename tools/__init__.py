@@ -0,0 +1 @@
+"""Offline tools for Eco Thermostat (benchmarks, replay, tuning)."""
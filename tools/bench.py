@@ -0,0 +1,308 @@
+"""Headless microbenchmarks for the Eco Thermostat update path.
+
+Runs the production SensorManager, ControlLogic, OffsetManager, the shared
+coordinator pass and EcoThermostatClimate.async_update against the in-process
+stand-ins from ``tools.harness`` with a seeded synthetic state stream.
+
+Usage::
+
+    python -m tools.bench
+    python -m tools.bench --zones 1,100,1000 --steps 200 --output bench.json
+    python -m tools.bench --compare bench.json
+
+Results are written as JSON together with the git commit and Python version
+so runs on different commits can be compared with ``--compare``.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import math
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Awaitable, Callable
+
+from custom_components.eco_thermostat.climate import EcoThermostatClimate
+
+from .harness import FakeHass, add_zone, attach_coordinator, make_entry
+
+SCENARIOS = ("sensors", "control", "offsets", "update", "pass")
+
+# Zones sharing one window sensor
+ZONES_PER_WINDOW = 10
+
+
+class SyntheticStream:
+    """Deterministic temperature/window stream for a set of zones."""
+
+    def __init__(self, zones: int, seed: int) -> None:
+        """Initialize the stream."""
+        self.zones = zones
+        self.random = random.Random(seed)
+        self.phases = [self.random.random() * 2 * math.pi for _ in range(zones)]
+        self.windows_open: dict[int, bool] = {}
+
+    def temperature(self, zone: int, step: int) -> float:
+        """Return the sensor reading of a zone at a step."""
+        base = 21.0 + 1.5 * math.sin(step / 40 + self.phases[zone])
+        return round(base + self.random.gauss(0, 0.1), 1)
+
+    def window(self, group: int) -> bool:
+        """Return the (occasionally toggling) state of a shared window."""
+        is_open = self.windows_open.get(group, False)
+        if self.random.random() < 0.01:
+            is_open = not is_open
+        self.windows_open[group] = is_open
+        return is_open
+
+
+def _entity_ids(index: int) -> dict[str, str]:
+    """Return the entity ids of a synthetic zone."""
+    return {
+        "sensor": f"sensor.zone{index}_temperature",
+        "heater": f"climate.zone{index}_trv",
+        "offset": f"number.zone{index}_calibration",
+        "window": f"binary_sensor.window{index // ZONES_PER_WINDOW}",
+    }
+
+
+def build(hass: FakeHass, zones: int):
+    """Create the coordinator, zones and climate entities."""
+    coordinator = attach_coordinator(hass)
+    entities = []
+    for index in range(zones):
+        ids = _entity_ids(index)
+        hass.states.async_set(ids["sensor"], "21.0")
+        hass.states.async_set(ids["heater"], "off", {"current_temperature": 20.0})
+        hass.states.async_set(ids["offset"], "0.0")
+        hass.states.async_set(ids["window"], "off")
+        entry = make_entry(
+            f"zone{index}",
+            {
+                "name": f"Zone {index}",
+                "heater": ids["heater"],
+                "sensor_temp": ids["sensor"],
+                "windows": [ids["window"]],
+                "heater_offset_entity": ids["offset"],
+            },
+            {"min_run_seconds": 0, "min_idle_seconds": 0, "smoothing_alpha": 0.3},
+        )
+        zone = add_zone(coordinator, entry)
+        entities.append(EcoThermostatClimate(hass, entry, coordinator, zone))
+    return coordinator, entities
+
+
+def feed(hass: FakeHass, stream: SyntheticStream, step: int) -> set[str]:
+    """Push one step of the stream into the state machine."""
+    changed = set()
+    for group in range(math.ceil(stream.zones / ZONES_PER_WINDOW)):
+        entity_id = f"binary_sensor.window{group}"
+        state = "on" if stream.window(group) else "off"
+        if hass.states.get(entity_id).state != state:
+            hass.states.async_set(entity_id, state)
+            changed.add(entity_id)
+    for index in range(stream.zones):
+        ids = _entity_ids(index)
+        temp = stream.temperature(index, step)
+        hass.states.async_set(ids["sensor"], str(temp))
+        heater = hass.states.get(ids["heater"])
+        hass.states.async_set(
+            ids["heater"], heater.state, {"current_temperature": round(temp - 0.8, 1)}
+        )
+        changed.update((ids["sensor"], ids["heater"]))
+    return changed
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    """Return a percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percentile / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def _run_scenario(scenario: str, zones: int, steps: int, seed: int, trace: bool) -> dict:
+    """Run one scenario and return its measurements."""
+    hass = FakeHass()
+    coordinator, entities = build(hass, zones)
+    stream = SyntheticStream(zones, seed)
+    zone_list = list(coordinator.zones.values())
+
+    def calls_for_step(step: int) -> list[Callable[[], Awaitable]]:
+        """Return the measured calls of a step (one per evaluation or pass)."""
+        if scenario == "sensors":
+            return [zone.sensors.update for zone in zone_list]
+        if scenario == "control":
+            return [
+                (lambda zone=zone: zone.control.evaluate(zone.sensors.current_temp))
+                for zone in zone_list
+            ]
+        if scenario == "offsets":
+            return [
+                (lambda zone=zone: zone.offset_manager.update_offsets(zone.sensors.current_temp))
+                for zone in zone_list
+            ]
+        if scenario == "update":
+            return [entity.async_update for entity in entities]
+        return [coordinator.async_refresh]
+
+    evaluations_per_call = zones if scenario == "pass" else 1
+    latencies: list[float] = []
+    evaluations = 0
+
+    # Warm up caches and the first evaluation outside of the measurement
+    await coordinator.async_refresh()
+    hass.services.calls = hass.services.entity_calls = 0
+
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+        mem_before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    started = time.perf_counter()
+    for step in range(steps):
+        feed(hass, stream, step)
+        if scenario in ("sensors", "control", "offsets"):
+            # Inputs for the isolated steps come from a full read
+            if scenario != "sensors":
+                for zone in zone_list:
+                    await zone.sensors.update()
+        for call in calls_for_step(step):
+            begin = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - begin)
+            evaluations += evaluations_per_call
+        await coordinator.dispatcher.async_flush()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "scenario": scenario,
+        "zones": zones,
+        "steps": steps,
+        "evaluations": evaluations,
+        "evaluations_per_s": evaluations / elapsed if elapsed else 0.0,
+        "service_calls": hass.services.calls,
+        "service_calls_per_evaluation": hass.services.calls / evaluations if evaluations else 0.0,
+        "entity_calls_per_evaluation": (
+            hass.services.entity_calls / evaluations if evaluations else 0.0
+        ),
+        "latency_p50_us": _percentile(latencies, 50) * 1e6,
+        "latency_p99_us": _percentile(latencies, 99) * 1e6,
+        "latency_mean_us": statistics.fmean(latencies) * 1e6 if latencies else 0.0,
+    }
+
+    if trace:
+        mem_after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["alloc_net_bytes_per_evaluation"] = (mem_after - mem_before) / max(evaluations, 1)
+        result["alloc_peak_kib"] = (peak - mem_before) / 1024
+
+    for zone in zone_list:
+        zone.async_shutdown()
+    return result
+
+
+async def run(scenarios: list[str], zone_counts: list[int], steps: int, seed: int) -> list[dict]:
+    """Run all requested scenarios; allocations are measured in a separate run."""
+    results = []
+    for scenario in scenarios:
+        for zones in zone_counts:
+            # Keep the total work per measurement roughly constant
+            scenario_steps = max(5, steps // max(1, zones // 10))
+            timed = await _run_scenario(scenario, zones, scenario_steps, seed, trace=False)
+            traced = await _run_scenario(
+                scenario, zones, max(3, scenario_steps // 4), seed, trace=True
+            )
+            timed["alloc_net_bytes_per_evaluation"] = traced["alloc_net_bytes_per_evaluation"]
+            timed["alloc_peak_kib"] = traced["alloc_peak_kib"]
+            results.append(timed)
+    return results
+
+
+def _git_commit() -> str:
+    """Return the current git commit, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _print_table(results: list[dict], baseline: dict) -> None:
+    """Print the results, with the relative change against a baseline."""
+    header = (
+        f"{'scenario':<9} {'zones':>5} {'evals/s':>11} {'calls/eval':>10} "
+        f"{'p50 us':>9} {'p99 us':>9} {'B/eval':>8} {'peak KiB':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        line = (
+            f"{result['scenario']:<9} {result['zones']:>5} "
+            f"{result['evaluations_per_s']:>11.0f} "
+            f"{result['service_calls_per_evaluation']:>10.3f} "
+            f"{result['latency_p50_us']:>9.1f} {result['latency_p99_us']:>9.1f} "
+            f"{result['alloc_net_bytes_per_evaluation']:>8.0f} "
+            f"{result['alloc_peak_kib']:>9.1f}"
+        )
+        old = baseline.get((result["scenario"], result["zones"]))
+        if old and old["evaluations_per_s"]:
+            change = result["evaluations_per_s"] / old["evaluations_per_s"] - 1
+            line += f"  ({change:+.1%} evals/s vs {old.get('commit', 'baseline')})"
+        print(line)
+
+
+def main(argv=None) -> int:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS)
+    parser.add_argument("--zones", default="1,100,1000")
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args(argv)
+
+    zone_counts = [int(value) for value in args.zones.split(",")]
+    results = asyncio.run(run(args.scenario or list(SCENARIOS), zone_counts, args.steps, args.seed))
+
+    meta = {
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "steps": args.steps,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            previous = json.load(file)
+        for result in previous["results"]:
+            baseline[(result["scenario"], result["zones"])] = {
+                **result,
+                "commit": previous["meta"]["commit"],
+            }
+
+    print(f"commit {meta['commit']}, python {meta['python']}, seed {meta['seed']}")
+    _print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"meta": meta, "results": results}, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Lightweight in-process stand-in for Home Assistant used by the offline tools.
+
+Only what the integration touches on its hot path is provided:
+``hass.states.get``, ``hass.services.async_call`` and the loop hooks used by
+``async_call_later``. Everything else runs the production code unchanged.
+"""
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+from custom_components.eco_thermostat.coordinator import EcoThermostatCoordinator, Zone
+
+
+class FakeState:
+    """Minimal state object with the fields the integration reads."""
+
+    __slots__ = ("entity_id", "state", "attributes", "last_updated", "last_reported")
+
+    def __init__(
+        self,
+        entity_id: str,
+        state: str,
+        attributes: Optional[dict] = None,
+        last_updated: Optional[datetime] = None,
+    ) -> None:
+        """Initialize the state."""
+        self.entity_id = entity_id
+        self.state = state
+        self.attributes = attributes or {}
+        self.last_updated = last_updated or datetime.now(timezone.utc)
+        self.last_reported = self.last_updated
+
+
+class FakeStates:
+    """Stand-in for hass.states."""
+
+    def __init__(self) -> None:
+        """Initialize the state machine."""
+        self._states: dict[str, FakeState] = {}
+        self.listener: Optional[Callable[[str, Optional[FakeState], FakeState], None]] = None
+
+    def get(self, entity_id: str) -> Optional[FakeState]:
+        """Return the state of an entity."""
+        return self._states.get(entity_id)
+
+    def async_set(
+        self,
+        entity_id: str,
+        state: str,
+        attributes: Optional[dict] = None,
+        last_updated: Optional[datetime] = None,
+    ) -> FakeState:
+        """Set a state and notify the listener like a state_changed event."""
+        old_state = self._states.get(entity_id)
+        new_state = self._states[entity_id] = FakeState(
+            entity_id, state, attributes, last_updated
+        )
+        if self.listener is not None:
+            self.listener(entity_id, old_state, new_state)
+        return new_state
+
+
+class FakeServices:
+    """Stand-in for hass.services that records calls."""
+
+    def __init__(self, states: FakeStates, apply: bool = True) -> None:
+        """Initialize the service registry."""
+        self.states = states
+        self.apply = apply
+        self.calls = 0
+        self.entity_calls = 0
+        self.by_service: Counter = Counter()
+        self.on_call: Optional[Callable[[str, str, dict], None]] = None
+
+    async def async_call(
+        self, domain: str, service: str, data: dict, blocking: bool = False
+    ) -> None:
+        """Record a service call and apply its effect to the target states."""
+        entity_ids = data["entity_id"]
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+        self.calls += 1
+        self.entity_calls += len(entity_ids)
+        self.by_service[f"{domain}.{service}"] += 1
+        if self.on_call is not None:
+            self.on_call(domain, service, data)
+        if not self.apply:
+            return
+        for entity_id in entity_ids:
+            old = self.states.get(entity_id)
+            attributes = dict(old.attributes) if old else {}
+            if service == "set_hvac_mode":
+                self.states.async_set(entity_id, str(data["hvac_mode"]), attributes)
+            elif service == "set_value":
+                self.states.async_set(entity_id, str(data["value"]), attributes)
+
+
+class FakeHass:
+    """Stand-in for HomeAssistant."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Initialize the instance."""
+        self.loop = loop or asyncio.get_running_loop()
+        self.data: dict[str, Any] = {}
+        self.states = FakeStates()
+        self.services = FakeServices(self.states)
+
+    def async_run_hass_job(self, job, *args):
+        """Run a HassJob target like the core does."""
+        result = job.target(*args)
+        if asyncio.iscoroutine(result):
+            return self.loop.create_task(result)
+        return result
+
+    def async_create_task(self, target, *args, **kwargs):
+        """Schedule a coroutine."""
+        return self.loop.create_task(target)
+
+
+def make_entry(entry_id: str, data: dict, options: Optional[dict] = None) -> SimpleNamespace:
+    """Return an object with the config entry fields the integration reads."""
+    return SimpleNamespace(
+        entry_id=entry_id,
+        title=data.get("name", entry_id),
+        data=data,
+        options=options or {},
+    )
+
+
+def attach_coordinator(hass: FakeHass) -> EcoThermostatCoordinator:
+    """Create a coordinator and route state changes into its caches.
+
+    This mirrors the coordinator's state-change listener without HA's event
+    bus, timers or debouncer; callers drive the passes explicitly.
+    """
+    coordinator = EcoThermostatCoordinator(hass)
+
+    def _on_state(entity_id: str, _old_state, new_state) -> None:
+        coordinator.states.async_update(entity_id, new_state)
+        coordinator.windows.async_update(entity_id, new_state)
+
+    hass.states.listener = _on_state
+    return coordinator
+
+
+def add_zone(coordinator: EcoThermostatCoordinator, entry) -> Zone:
+    """Register a zone without subscribing to HA events."""
+    zone = Zone(
+        coordinator.hass,
+        entry,
+        coordinator.dispatcher,
+        coordinator.states,
+        coordinator.windows,
+    )
+    zone.armed = True
+    zone.grace_until = 0.0
+    coordinator.zones[zone.entry_id] = zone
+    coordinator.windows.async_add_zone(zone.entry_id, zone.control.windows)
+    return zone
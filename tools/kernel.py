@@ -0,0 +1,363 @@
+"""Vectorized NumPy version of the hysteresis state machine.
+
+Steps the deadband / anti-short-cycling logic of ``ControlLogic`` together
+with the offset and EMA smoothing of ``SensorManager`` over arrays of
+zones x timesteps. The time loop stays sequential (the state machine depends
+on the previous step), every step is evaluated for all zones at once.
+
+The kernel expects one already fused reading per zone and step (NaN when the
+sensor is unavailable); multi-sensor aggregation is not part of it. Each
+step corresponds to one evaluation of the zone.
+
+``python -m tools.kernel --cross-check`` runs random inputs through the
+kernel and through the real async ``SensorManager``/``ControlLogic`` and
+fails on any difference in the action or running-state traces.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+
+from custom_components.eco_thermostat.const import SMOOTHING_REFERENCE_SECONDS
+from custom_components.eco_thermostat.history import ACTION_CODES
+
+from .harness import FakeHass, add_zone, attach_coordinator, make_entry
+
+MODE_OFF = 0
+MODE_HEAT = 1
+MODE_COOL = 2
+MODE_CODES = {"off": MODE_OFF, "heat": MODE_HEAT, "cool": MODE_COOL}
+
+OFF = ACTION_CODES["off"]
+IDLE = ACTION_CODES["idle"]
+HEATING = ACTION_CODES["heating"]
+COOLING = ACTION_CODES["cooling"]
+
+
+@dataclass
+class KernelParams:
+    """Per-zone settings, each an array of length zones."""
+
+    target: np.ndarray
+    mode: np.ndarray
+    deadband: np.ndarray
+    min_run: np.ndarray
+    min_idle: np.ndarray
+    alpha: np.ndarray
+    offset: np.ndarray
+    frost_temp: np.ndarray
+    window_frost: np.ndarray
+
+    @classmethod
+    def from_options(cls, zones: list[tuple[dict, dict]], modes: list[str], targets: list[float]):
+        """Build the arrays from (data, options) pairs like ControlLogic reads them."""
+        return cls(
+            target=np.array(targets, dtype=np.float64),
+            mode=np.array([MODE_CODES[mode] for mode in modes], dtype=np.int8),
+            deadband=np.array([float(o.get("deadband", 0.5)) for _, o in zones]),
+            min_run=np.array([int(o.get("min_run_seconds", 180)) for _, o in zones], dtype=np.float64),
+            min_idle=np.array([int(o.get("min_idle_seconds", 180)) for _, o in zones], dtype=np.float64),
+            alpha=np.array([float(o.get("smoothing_alpha", 0.0)) for _, o in zones]),
+            offset=np.array([float(d.get("temp_offset", 0.0)) for d, _ in zones]),
+            frost_temp=np.array([float(o.get("frost_temp", 5.0)) for _, o in zones]),
+            window_frost=np.array([o.get("window_mode", "frost") != "off" for _, o in zones]),
+        )
+
+
+@dataclass
+class KernelResult:
+    """Traces of shape zones x timesteps."""
+
+    actions: np.ndarray
+    heating: np.ndarray
+    cooling: np.ndarray
+    current_temp: np.ndarray
+
+
+def simulate(
+    params: KernelParams,
+    raw_temps: np.ndarray,
+    window_open: np.ndarray,
+    times: np.ndarray,
+) -> KernelResult:
+    """Run the state machine over zones x timesteps.
+
+    ``raw_temps`` and ``window_open`` have shape (zones, steps), ``times``
+    holds the evaluation time of every step as UNIX timestamps, either shared
+    (steps,) or per zone (zones, steps).
+    """
+    zones, steps = raw_temps.shape
+    times = np.broadcast_to(times, (zones, steps))
+
+    actions = np.empty((zones, steps), dtype=np.int8)
+    heating_trace = np.empty((zones, steps), dtype=bool)
+    cooling_trace = np.empty((zones, steps), dtype=bool)
+    temp_trace = np.empty((zones, steps), dtype=np.float64)
+
+    # SensorManager state
+    smoothed = np.full(zones, np.nan)
+    smoothed_at = np.full(zones, np.nan)
+    current = np.full(zones, np.nan)
+    ema = (params.alpha > 0) & (params.alpha <= 1.0)
+    one_minus_alpha = 1 - params.alpha
+
+    # ControlLogic state
+    mode = params.mode.copy()
+    target = params.target.astype(np.float64).copy()
+    heating = np.zeros(zones, dtype=bool)
+    cooling = np.zeros(zones, dtype=bool)
+    last_change = np.zeros(zones)
+    was_open = np.zeros(zones, dtype=bool)
+    saved_mode = np.zeros(zones, dtype=np.int8)
+    saved_target = np.zeros(zones)
+    action = np.full(zones, IDLE, dtype=np.int8)
+
+    for step in range(steps):
+        now = times[:, step]
+
+        # Offset and EMA smoothing; unavailable readings keep the last value
+        raw = raw_temps[:, step]
+        valid = ~np.isnan(raw)
+        with_offset = raw + params.offset
+        first = valid & ema & np.isnan(smoothed)
+        blend = valid & ema & ~first
+        # The EMA weight is per SMOOTHING_REFERENCE_SECONDS of elapsed time
+        elapsed = np.maximum(now - smoothed_at, 0.0)
+        with np.errstate(invalid="ignore"):
+            alpha = np.where(
+                np.isnan(smoothed_at),
+                params.alpha,
+                1 - one_minus_alpha ** (elapsed / SMOOTHING_REFERENCE_SECONDS),
+            )
+        smoothed = np.where(blend, alpha * with_offset + (1 - alpha) * smoothed, smoothed)
+        smoothed = np.where(first, with_offset, smoothed)
+        smoothed_at = np.where(valid & ema, now, smoothed_at)
+        current = np.where(valid & ema, smoothed, current)
+        current = np.where(valid & ~ema, with_offset, current)
+
+        missing = np.isnan(current)
+        active = ~missing
+        window = window_open[:, step] & active
+
+        # Window opened: remember mode and target
+        opening = window & ~was_open
+        saved_mode = np.where(opening, mode, saved_mode)
+        saved_target = np.where(opening, target, saved_target)
+        was_open |= opening
+        window_off = window & ~params.window_frost
+        frost = window & params.window_frost
+        mode = np.where(frost, MODE_HEAT, mode)
+        target = np.where(frost, params.frost_temp, target)
+
+        # Window closed: restore
+        closing = active & ~window & was_open
+        was_open &= ~closing
+        mode = np.where(closing, saved_mode, mode)
+        target = np.where(closing, saved_target, target)
+
+        normal = active & ~window
+        switched_off = window_off | (normal & (mode == MODE_OFF))
+        action = np.where(missing, IDLE, action)
+        action = np.where(switched_off, OFF, action)
+        heating &= ~(missing | switched_off)
+        cooling &= ~(missing | switched_off)
+
+        heat = frost | (normal & (mode == MODE_HEAT))
+        cool = normal & (mode == MODE_COOL)
+        low = target - params.deadband
+        high = target + params.deadband
+        elapsed = now - last_change
+        below = current < low
+        above = current > high
+        idle_wait = (last_change > 0) & (elapsed < params.min_idle)
+        min_run_wait = elapsed < params.min_run
+
+        # Heating
+        start = heat & below & ~heating & ~idle_wait
+        hold = heat & above & heating & min_run_wait
+        stop = heat & above & heating & ~min_run_wait
+        heat_running = (heating | start) & ~stop
+        action = np.where(
+            heat,
+            np.where(
+                below,
+                np.where(heating | start, HEATING, IDLE),
+                np.where(above, np.where(hold, HEATING, IDLE), np.where(heating, HEATING, IDLE)),
+            ),
+            action,
+        )
+        heating = np.where(heat, heat_running, heating)
+        changed = start | stop
+
+        # Cooling
+        start = cool & above & ~cooling & ~idle_wait
+        hold = cool & below & cooling & min_run_wait
+        stop = cool & below & cooling & ~min_run_wait
+        cool_running = (cooling | start) & ~stop
+        action = np.where(
+            cool,
+            np.where(
+                above,
+                np.where(cooling | start, COOLING, IDLE),
+                np.where(below, np.where(hold, COOLING, IDLE), np.where(cooling, COOLING, IDLE)),
+            ),
+            action,
+        )
+        cooling = np.where(cool, cool_running, cooling)
+        changed |= start | stop
+
+        last_change = np.where(changed, now, last_change)
+
+        actions[:, step] = action
+        heating_trace[:, step] = heating
+        cooling_trace[:, step] = cooling
+        temp_trace[:, step] = current
+
+    return KernelResult(actions, heating_trace, cooling_trace, temp_trace)
+
+
+async def async_reference(
+    zones: list[tuple[dict, dict]],
+    modes: list[str],
+    targets: list[float],
+    raw_temps: np.ndarray,
+    window_open: np.ndarray,
+    times: np.ndarray,
+) -> KernelResult:
+    """Run the same inputs through the real async SensorManager and ControlLogic."""
+    hass = FakeHass()
+    coordinator = attach_coordinator(hass)
+    count, steps = raw_temps.shape
+    times = np.broadcast_to(times, (count, steps))
+    result = KernelResult(
+        np.empty((count, steps), dtype=np.int8),
+        np.empty((count, steps), dtype=bool),
+        np.empty((count, steps), dtype=bool),
+        np.empty((count, steps), dtype=np.float64),
+    )
+
+    for index, (data, options) in enumerate(zones):
+        sensor = f"sensor.zone{index}"
+        window = f"binary_sensor.zone{index}_window"
+        heater = f"climate.zone{index}_heater"
+        cooler = f"climate.zone{index}_cooler"
+        hass.states.async_set(heater, "off")
+        hass.states.async_set(cooler, "off")
+        entry = make_entry(
+            f"zone{index}",
+            {**data, "sensor_temp": sensor, "heater": heater, "cooler": cooler, "windows": [window]},
+            options,
+        )
+        zone = add_zone(coordinator, entry)
+        control = zone.control
+        control.hvac_mode = modes[index]
+        control.target_temp = targets[index]
+        now = 0.0
+        control.clock = lambda: now
+        zone.sensors.clock = lambda: datetime.fromtimestamp(now, timezone.utc)
+
+        for step in range(steps):
+            now = float(times[index, step])
+            value = raw_temps[index, step]
+            hass.states.async_set(sensor, "unavailable" if np.isnan(value) else repr(float(value)))
+            hass.states.async_set(window, "on" if window_open[index, step] else "off")
+            await zone.sensors.update()
+            await control.evaluate(zone.sensors.current_temp)
+            await coordinator.dispatcher.async_flush()
+            result.actions[index, step] = ACTION_CODES[str(control.hvac_action)]
+            result.heating[index, step] = control._is_heating
+            result.cooling[index, step] = control._is_cooling
+            current = zone.sensors.current_temp
+            result.current_temp[index, step] = np.nan if current is None else current
+        zone.async_shutdown()
+    return result
+
+
+def random_inputs(zones: int, steps: int, seed: int):
+    """Return random settings and inputs that exercise every branch."""
+    rng = np.random.default_rng(seed)
+    configs = []
+    modes = []
+    targets = []
+    for _ in range(zones):
+        options = {
+            "deadband": float(rng.choice([0.1, 0.3, 0.5, 1.0])),
+            "min_run_seconds": int(rng.choice([0, 60, 180, 600])),
+            "min_idle_seconds": int(rng.choice([0, 60, 180, 600])),
+            "smoothing_alpha": float(rng.choice([0.0, 0.15, 0.3, 1.0])),
+            "frost_temp": float(rng.choice([5.0, 7.0])),
+            "window_mode": str(rng.choice(["frost", "off"])),
+        }
+        data = {"name": "zone", "temp_offset": float(rng.choice([0.0, -0.5, 0.3]))}
+        configs.append((data, options))
+        modes.append(str(rng.choice(["heat", "heat", "cool", "off"])))
+        targets.append(float(rng.choice([19.0, 21.0, 22.5])))
+
+    walk = 20.0 + np.cumsum(rng.normal(0, 0.15, (zones, steps)), axis=1)
+    raw = np.round(walk, 2)
+    raw[rng.random((zones, steps)) < 0.02] = np.nan
+    toggles = rng.random((zones, steps)) < 0.01
+    window_open = np.cumsum(toggles, axis=1) % 2 == 1
+    times = 1.7e9 + np.cumsum(rng.integers(5, 120, steps)).astype(np.float64)
+    return configs, modes, targets, raw, window_open, times
+
+
+def cross_check(zones: int = 40, steps: int = 1500, seed: int = 1) -> list[str]:
+    """Compare the kernel with the async implementation, return the differences."""
+    configs, modes, targets, raw, window_open, times = random_inputs(zones, steps, seed)
+    params = KernelParams.from_options(configs, modes, targets)
+    kernel = simulate(params, raw, window_open, times)
+    reference = asyncio.run(async_reference(configs, modes, targets, raw, window_open, times))
+
+    problems = []
+    for name in ("actions", "heating", "cooling"):
+        mismatch = np.argwhere(getattr(kernel, name) != getattr(reference, name))
+        if len(mismatch):
+            zone, step = mismatch[0]
+            problems.append(f"{name}: {len(mismatch)} differences, first at zone {zone} step {step}")
+    # NumPy and math may round the time-weighted EMA power in the last bit
+    same_temp = np.isclose(
+        kernel.current_temp, reference.current_temp, rtol=0.0, atol=1e-9, equal_nan=True
+    )
+    if not same_temp.all():
+        zone, step = np.argwhere(~same_temp)[0]
+        problems.append(f"current_temp differs, first at zone {zone} step {step}")
+    return problems
+
+
+def main(argv=None) -> int:
+    """Cross-check or time the kernel from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cross-check", action="store_true")
+    parser.add_argument("--zones", type=int, default=40)
+    parser.add_argument("--steps", type=int, default=1500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.cross_check:
+        problems = cross_check(args.zones, args.steps, args.seed)
+        for problem in problems:
+            print(problem)
+        if problems:
+            return 1
+        print(f"kernel matches ControlLogic for {args.zones} zones x {args.steps} steps")
+        return 0
+
+    configs, modes, targets, raw, window_open, times = random_inputs(
+        args.zones, args.steps, args.seed
+    )
+    params = KernelParams.from_options(configs, modes, targets)
+    started = time.perf_counter()
+    simulate(params, raw, window_open, times)
+    elapsed = time.perf_counter() - started
+    cells = args.zones * args.steps
+    print(f"{cells} zone-steps in {elapsed:.3f}s ({cells / elapsed:,.0f}/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,431 @@
+"""Replay recorded history through the real sensor and control code.
+
+Feeds exported recorder history (temperature, window and heater states)
+through ``SensorManager`` and ``ControlLogic`` on a simulated clock, faster
+than real time, and reports per-zone switching and comfort metrics.
+
+Input files are CSV (``entity_id,state,last_changed`` as exported from the HA
+history panel, optionally with a ``current_temperature`` column) or JSONL
+(``{"entity_id": ..., "state": ..., "last_changed": ..., "attributes": {...}}``),
+optionally gzip-compressed. Every file must be in chronological order; several
+files (e.g. one export per entity) are merged lazily, so memory use does not
+grow with the length of the history.
+
+Usage::
+
+    python -m tools.replay history.csv --zones zones.json
+    python -m tools.replay sensor.csv.gz window.csv.gz \\
+        --sensor sensor.living_temperature --heater climate.living_trv \\
+        --window binary_sensor.living_window --set deadband=0.3
+
+``zones.json`` maps a zone name to the config entry ``data`` and ``options``
+of that zone: ``{"living": {"data": {...}, "options": {...}}}``.
+
+The replay is open loop: recorded temperatures are not affected by the
+simulated heater, so metrics compare settings on the same input rather than
+predicting the room temperature.
+"""
+import argparse
+import asyncio
+import csv
+import gzip
+import heapq
+import itertools
+import json
+import logging
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import IO, Iterable, Iterator, Optional
+
+from custom_components.eco_thermostat.const import SAFETY_POLL_SECONDS
+
+from .harness import FakeHass, add_zone, attach_coordinator, make_entry
+
+# Shortest on/off period that is not counted as a short cycle
+DEFAULT_SHORT_CYCLE_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class Record:
+    """One recorded state change."""
+
+    timestamp: float
+    entity_id: str
+    state: str
+    attributes: dict = field(default_factory=dict, compare=False)
+
+
+class SimClock:
+    """Simulated wall clock shared by all zones."""
+
+    def __init__(self, start: float = 0.0) -> None:
+        """Initialize the clock."""
+        self.now = start
+
+    def time(self) -> float:
+        """Return the simulated time as a UNIX timestamp."""
+        return self.now
+
+    def utcnow(self) -> datetime:
+        """Return the simulated time as an aware datetime."""
+        return datetime.fromtimestamp(self.now, timezone.utc)
+
+
+def parse_timestamp(value) -> float:
+    """Parse an epoch number or an ISO 8601 string into a UNIX timestamp."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _open(path: str) -> IO[str]:
+    """Open a plain or gzip-compressed text file."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _timestamp_of(row: dict):
+    """Return the raw timestamp field of an exported row."""
+    for key in ("last_changed", "last_updated", "timestamp", "time"):
+        if row.get(key) not in (None, ""):
+            return row[key]
+    raise ValueError(f"Row without timestamp: {row}")
+
+
+def iter_records(path: str) -> Iterator[Record]:
+    """Stream the records of one CSV or JSONL file."""
+    with _open(path) as file:
+        if ".jsonl" in path or ".ndjson" in path:
+            rows: Iterable[dict] = (json.loads(line) for line in file if line.strip())
+        else:
+            rows = csv.DictReader(file)
+        for row in rows:
+            attributes = dict(row.get("attributes") or {})
+            if row.get("current_temperature") not in (None, ""):
+                attributes["current_temperature"] = row["current_temperature"]
+            yield Record(
+                parse_timestamp(_timestamp_of(row)),
+                row["entity_id"],
+                str(row["state"]),
+                attributes,
+            )
+
+
+def merge_records(paths: Iterable[str]) -> Iterator[Record]:
+    """Merge several chronological files into one chronological stream."""
+    return heapq.merge(
+        *(iter_records(path) for path in paths), key=lambda record: record.timestamp
+    )
+
+
+@dataclass
+class ZoneMetrics:
+    """Switching and comfort metrics of one zone."""
+
+    evaluations: int = 0
+    switches: int = 0
+    short_cycles: int = 0
+    recorded_switches: int = 0
+    commands_sent: int = 0
+    duration_seconds: float = 0.0
+    heater_on_seconds: float = 0.0
+    cooler_on_seconds: float = 0.0
+    active_seconds: float = 0.0
+    deadband_seconds: float = 0.0
+    deviation_integral: float = 0.0
+    comfort_error_integral: float = 0.0
+
+    @property
+    def deadband_share(self) -> float:
+        """Return the share of active time spent within the deadband."""
+        return self.deadband_seconds / self.active_seconds if self.active_seconds else 0.0
+
+    @property
+    def switches_per_day(self) -> float:
+        """Return the switch rate over the replayed period."""
+        if not self.duration_seconds:
+            return 0.0
+        return self.switches * 86400 / self.duration_seconds
+
+    @property
+    def deviation(self) -> float:
+        """Return the time-weighted mean absolute deviation from the target."""
+        if not self.active_seconds:
+            return 0.0
+        return self.deviation_integral / self.active_seconds
+
+    @property
+    def comfort_error(self) -> float:
+        """Return the time-weighted mean deviation the control did not act on.
+
+        Counts the temperature below target while not heating and above
+        target while heating (mirrored for cooling). Unlike the plain
+        deviation this depends on the settings even though the replay is
+        open loop.
+        """
+        if not self.active_seconds:
+            return 0.0
+        return self.comfort_error_integral / self.active_seconds
+
+    def as_dict(self) -> dict:
+        """Return the metrics including the derived values."""
+        return {
+            **asdict(self),
+            "deadband_share": self.deadband_share,
+            "switches_per_day": self.switches_per_day,
+            "deviation": self.deviation,
+            "comfort_error": self.comfort_error,
+        }
+
+
+class ZoneReplay:
+    """Replay state of one zone."""
+
+    def __init__(self, zone, clock: SimClock, short_cycle: float) -> None:
+        """Attach the simulated clock to the zone."""
+        self.zone = zone
+        self.control = zone.control
+        self.sensors = zone.sensors
+        self.control.clock = clock.time
+        self.sensors.clock = clock.utcnow
+        self.short_cycle = short_cycle
+        self.metrics = ZoneMetrics()
+        self._last_switch: Optional[float] = None
+        self._raw_temp: Optional[float] = None
+        self._recorded_heater: Optional[bool] = None
+
+    @property
+    def _running(self) -> tuple[bool, bool]:
+        """Return whether heating and cooling are running."""
+        return (self.control._is_heating, self.control._is_cooling)
+
+    def integrate(self, seconds: float) -> None:
+        """Account for a period in which the zone state did not change."""
+        if seconds <= 0:
+            return
+        metrics = self.metrics
+        metrics.duration_seconds += seconds
+        heating, cooling = self._running
+        if heating:
+            metrics.heater_on_seconds += seconds
+        if cooling:
+            metrics.cooler_on_seconds += seconds
+
+        # Comfort is judged on the unsmoothed reading so smoothing is not
+        # rewarded for hiding deviations from itself
+        temp = self._raw_temp
+        mode = str(self.control.hvac_mode)
+        if temp is None or mode == "off" or self.control.window_open:
+            return
+        error = temp - self.control.target_temp
+        metrics.active_seconds += seconds
+        metrics.deviation_integral += abs(error) * seconds
+        if abs(error) <= self.control.deadband:
+            metrics.deadband_seconds += seconds
+        running = cooling if mode == "cool" else heating
+        if mode == "cool":
+            error = -error
+        if (error < 0 and not running) or (error > 0 and running):
+            metrics.comfort_error_integral += abs(error) * seconds
+
+    async def evaluate(self, now: float, changed: Optional[set[str]]) -> None:
+        """Run the real update path and record switches."""
+        before = self._running
+        await self.sensors.update(changed)
+        raw = self.sensors._aggregate()
+        self._raw_temp = None if raw is None else raw + self.sensors.offset
+        await self.control.evaluate(self.sensors.current_temp)
+        self.metrics.evaluations += 1
+        if self._running != before:
+            self.metrics.switches += 1
+            if self._last_switch is not None and now - self._last_switch < self.short_cycle:
+                self.metrics.short_cycles += 1
+            self._last_switch = now
+
+    def record_heater(self, state: str) -> None:
+        """Count switches of the heater in the recording for comparison."""
+        running = state not in ("off", "unavailable", "unknown")
+        if self._recorded_heater is not None and running != self._recorded_heater:
+            self.metrics.recorded_switches += 1
+        self._recorded_heater = running
+
+
+async def async_replay(
+    records: Iterable[Record],
+    zones: dict[str, dict],
+    overrides: Optional[dict] = None,
+    tick: float = SAFETY_POLL_SECONDS,
+    short_cycle: float = DEFAULT_SHORT_CYCLE_SECONDS,
+    apply_heater: bool = False,
+) -> dict[str, ZoneMetrics]:
+    """Replay a chronological record stream and return metrics per zone.
+
+    Zones are evaluated whenever one of their inputs changes (like the
+    coordinator's push updates) and every ``tick`` seconds (like the safety
+    poll). Recorded heater states only count as a baseline unless
+    ``apply_heater`` is set, in which case they overwrite the simulated state.
+    """
+    hass = FakeHass()
+    coordinator = attach_coordinator(hass)
+    clock = SimClock()
+
+    replays: dict[str, ZoneReplay] = {}
+    entity_zones: dict[str, list[ZoneReplay]] = {}
+    heater_zones: dict[str, list[ZoneReplay]] = {}
+    for name, config in zones.items():
+        options = {**config.get("options", {}), **(overrides or {})}
+        entry = make_entry(name, config["data"], options)
+        replay = replays[name] = ZoneReplay(add_zone(coordinator, entry), clock, short_cycle)
+        control = replay.control
+        for entity_id in replay.sensors.sensor_temps + list(control.windows):
+            entity_zones.setdefault(entity_id, []).append(replay)
+        for entity_id in (control.heater_entity, control.cooler_entity):
+            if entity_id:
+                heater_zones.setdefault(entity_id, []).append(replay)
+                if hass.states.get(entity_id) is None:
+                    hass.states.async_set(entity_id, "off")
+
+    next_tick: Optional[float] = None
+
+    async def advance(to: float) -> None:
+        """Integrate up to a point in time and run the safety ticks on the way."""
+        nonlocal next_tick
+        while next_tick is not None and next_tick <= to:
+            for replay in replays.values():
+                replay.integrate(next_tick - clock.now)
+            clock.now = next_tick
+            for replay in replays.values():
+                await replay.evaluate(clock.now, None)
+            await coordinator.dispatcher.async_flush()
+            next_tick += tick
+        for replay in replays.values():
+            replay.integrate(to - clock.now)
+        clock.now = to
+
+    for timestamp, group in itertools.groupby(records, key=lambda record: record.timestamp):
+        if next_tick is None:
+            clock.now = timestamp
+            next_tick = timestamp + tick
+        await advance(timestamp)
+
+        changed: set[str] = set()
+        dirty: dict[str, ZoneReplay] = {}
+        updated = clock.utcnow()
+        for record in group:
+            if record.entity_id in heater_zones:
+                for replay in heater_zones[record.entity_id]:
+                    replay.record_heater(record.state)
+                if not apply_heater:
+                    continue
+            elif record.entity_id not in entity_zones:
+                continue
+            hass.states.async_set(record.entity_id, record.state, record.attributes, updated)
+            changed.add(record.entity_id)
+            for replay in entity_zones.get(record.entity_id, ()):
+                dirty[replay.zone.entry_id] = replay
+
+        for replay in dirty.values():
+            await replay.evaluate(clock.now, changed)
+        if dirty:
+            await coordinator.dispatcher.async_flush()
+
+    for replay in replays.values():
+        replay.metrics.commands_sent = replay.control.command_stats["commands_sent"]
+        replay.zone.async_shutdown()
+    return {name: replay.metrics for name, replay in replays.items()}
+
+
+def replay(
+    paths: list[str],
+    zones: dict[str, dict],
+    overrides: Optional[dict] = None,
+    **kwargs,
+) -> dict[str, ZoneMetrics]:
+    """Replay files synchronously (for scripts and worker processes)."""
+    return asyncio.run(async_replay(merge_records(paths), zones, overrides, **kwargs))
+
+
+def parse_overrides(values: Iterable[str]) -> dict:
+    """Parse ``key=value`` option overrides."""
+    overrides = {}
+    for value in values:
+        key, _, raw = value.partition("=")
+        try:
+            overrides[key] = json.loads(raw)
+        except json.JSONDecodeError:
+            overrides[key] = raw
+    return overrides
+
+
+def main(argv=None) -> int:
+    """Run a replay from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+", help="chronological CSV/JSONL exports")
+    parser.add_argument("--zones", help="JSON file with data/options per zone")
+    parser.add_argument("--sensor", action="append", default=[])
+    parser.add_argument("--heater")
+    parser.add_argument("--cooler")
+    parser.add_argument("--window", action="append", default=[])
+    parser.add_argument("--set", action="append", default=[], metavar="OPTION=VALUE")
+    parser.add_argument("--tick", type=float, default=SAFETY_POLL_SECONDS)
+    parser.add_argument("--short-cycle", type=float, default=DEFAULT_SHORT_CYCLE_SECONDS)
+    parser.add_argument("--apply-heater", action="store_true")
+    parser.add_argument("--output", help="write metrics as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.zones:
+        with open(args.zones, encoding="utf-8") as file:
+            zones = json.load(file)
+    elif args.sensor and args.heater:
+        data = {
+            "name": "zone",
+            "sensor_temp": args.sensor,
+            "heater": args.heater,
+            "cooler": args.cooler,
+            "windows": args.window,
+        }
+        zones = {"zone": {"data": data, "options": {}}}
+    else:
+        parser.error("either --zones or --sensor and --heater are required")
+
+    started = time.perf_counter()
+    results = replay(
+        args.files,
+        zones,
+        parse_overrides(args.set),
+        tick=args.tick,
+        short_cycle=args.short_cycle,
+        apply_heater=args.apply_heater,
+    )
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{'zone':<16} {'evals':>8} {'switch':>7} {'short':>6} {'recorded':>8} "
+        f"{'heat h':>8} {'deadband':>8} {'dev':>6} {'error':>6}"
+    )
+    for name, metrics in results.items():
+        print(
+            f"{name:<16} {metrics.evaluations:>8} {metrics.switches:>7} "
+            f"{metrics.short_cycles:>6} {metrics.recorded_switches:>8} "
+            f"{metrics.heater_on_seconds / 3600:>8.1f} {metrics.deadband_share:>8.1%} "
+            f"{metrics.deviation:>6.2f} {metrics.comfort_error:>6.2f}"
+        )
+    print(f"replayed in {elapsed:.1f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({name: m.as_dict() for name, m in results.items()}, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
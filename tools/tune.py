@@ -0,0 +1,222 @@
+"""Parameter sweep over the options-flow settings against recorded history.
+
+Every candidate option set is replayed with ``tools.replay`` (the production
+SensorManager and ControlLogic on a simulated clock) in a process pool using
+all cores. Candidates are scored per zone as::
+
+    score = comfort_error + switch_weight * switches_per_day
+            + short_cycle_weight * short_cycles_per_day
+
+and the best option set of every zone is printed together with its Pareto
+front (no other candidate has both fewer switches and a lower comfort error).
+
+Usage::
+
+    python -m tools.tune history.csv --zones zones.json
+    python -m tools.tune history.csv --zones zones.json --random 200 --seed 3
+    python -m tools.tune history.csv --zones zones.json \\
+        --grid deadband=0.2,0.3,0.5 --grid min_run_seconds=0,300,600
+
+Presets are not swept by default: they are the comfort targets the error is
+measured against. They can still be fixed for all candidates with ``--set``.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from custom_components.eco_thermostat.const import (
+    CONF_DEADBAND,
+    CONF_MIN_IDLE,
+    CONF_MIN_RUN,
+    CONF_SMOOTHING_ALPHA,
+)
+
+from .replay import DEFAULT_SHORT_CYCLE_SECONDS, parse_overrides, replay
+
+# Default grid, within the ranges of the options flow
+DEFAULT_GRID: dict[str, list] = {
+    CONF_DEADBAND: [0.2, 0.3, 0.5, 0.8],
+    CONF_MIN_RUN: [0, 180, 300, 600],
+    CONF_MIN_IDLE: [0, 180, 300, 600],
+    CONF_SMOOTHING_ALPHA: [0.0, 0.15, 0.3],
+}
+
+# (min, max, step) of the options flow selectors for random sampling
+SEARCH_SPACE: dict[str, tuple[float, float, float]] = {
+    CONF_DEADBAND: (0.1, 2.0, 0.1),
+    CONF_MIN_RUN: (0, 3600, 10),
+    CONF_MIN_IDLE: (0, 3600, 10),
+    CONF_SMOOTHING_ALPHA: (0.0, 1.0, 0.05),
+}
+
+DEFAULT_SWITCH_WEIGHT = 0.05
+DEFAULT_SHORT_CYCLE_WEIGHT = 0.2
+
+
+def grid_candidates(grid: dict[str, list]) -> list[dict]:
+    """Return all combinations of a grid."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def random_candidates(
+    count: int, seed: int, space: dict[str, tuple[float, float, float]] = SEARCH_SPACE
+) -> list[dict]:
+    """Sample option sets on the step grid of the options flow."""
+    rng = random.Random(seed)
+    candidates = []
+    for _ in range(count):
+        candidate = {}
+        for key, (low, high, step) in space.items():
+            value = low + step * rng.randint(0, round((high - low) / step))
+            candidate[key] = int(value) if isinstance(step, int) else round(value, 2)
+        candidates.append(candidate)
+    return candidates
+
+
+def score(metrics: dict, switch_weight: float, short_cycle_weight: float) -> float:
+    """Score the metrics of one zone (lower is better)."""
+    days = metrics["duration_seconds"] / 86400 or 1.0
+    return (
+        metrics["comfort_error"]
+        + switch_weight * metrics["switches_per_day"]
+        + short_cycle_weight * metrics["short_cycles"] / days
+    )
+
+
+def _evaluate(job: tuple[list[str], dict, dict, dict]) -> tuple[dict, dict]:
+    """Replay one candidate in a worker process."""
+    paths, zones, candidate, kwargs = job
+    results = replay(paths, zones, candidate, **kwargs)
+    return candidate, {name: metrics.as_dict() for name, metrics in results.items()}
+
+
+def pareto_front(results: list[tuple[dict, dict]]) -> list[tuple[dict, dict]]:
+    """Return the candidates not dominated in switches and comfort error."""
+    front = []
+    for candidate, metrics in results:
+        dominated = any(
+            other["switches"] <= metrics["switches"]
+            and other["comfort_error"] <= metrics["comfort_error"]
+            and (
+                other["switches"] < metrics["switches"]
+                or other["comfort_error"] < metrics["comfort_error"]
+            )
+            for _, other in results
+        )
+        if not dominated:
+            front.append((candidate, metrics))
+    return sorted(front, key=lambda item: item[1]["switches"])
+
+
+def tune(
+    paths: list[str],
+    zones: dict[str, dict],
+    candidates: list[dict],
+    fixed: Optional[dict] = None,
+    switch_weight: float = DEFAULT_SWITCH_WEIGHT,
+    short_cycle_weight: float = DEFAULT_SHORT_CYCLE_WEIGHT,
+    workers: Optional[int] = None,
+    **replay_kwargs,
+) -> dict[str, dict]:
+    """Replay all candidates in parallel and rank them per zone."""
+    jobs = [(paths, zones, {**(fixed or {}), **candidate}, replay_kwargs) for candidate in candidates]
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        runs = list(executor.map(_evaluate, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    report = {}
+    for zone in zones:
+        zone_runs = [(candidate, metrics[zone]) for candidate, metrics in runs]
+        ranked = sorted(
+            zone_runs,
+            key=lambda item: score(item[1], switch_weight, short_cycle_weight),
+        )
+        best_candidate, best_metrics = ranked[0]
+        report[zone] = {
+            "recommended": best_candidate,
+            "metrics": best_metrics,
+            "score": score(best_metrics, switch_weight, short_cycle_weight),
+            "pareto": [
+                {"options": candidate, "switches": m["switches"], "comfort_error": m["comfort_error"]}
+                for candidate, m in pareto_front(zone_runs)
+            ],
+        }
+    return report
+
+
+def _parse_grid(values: list[str]) -> dict[str, list]:
+    """Parse ``key=v1,v2,...`` grid axes."""
+    grid = {}
+    for value in values:
+        key, _, raw = value.partition("=")
+        grid[key] = [json.loads(item) for item in raw.split(",")]
+    return grid
+
+
+def main(argv=None) -> int:
+    """Run a sweep from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+", help="chronological CSV/JSONL exports")
+    parser.add_argument("--zones", required=True, help="JSON file with data/options per zone")
+    parser.add_argument("--grid", action="append", default=[], metavar="OPTION=V1,V2")
+    parser.add_argument("--random", type=int, help="sample this many random candidates")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--set", action="append", default=[], metavar="OPTION=VALUE")
+    parser.add_argument("--switch-weight", type=float, default=DEFAULT_SWITCH_WEIGHT)
+    parser.add_argument("--short-cycle-weight", type=float, default=DEFAULT_SHORT_CYCLE_WEIGHT)
+    parser.add_argument("--short-cycle", type=float, default=DEFAULT_SHORT_CYCLE_SECONDS)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.zones, encoding="utf-8") as file:
+        zones = json.load(file)
+
+    if args.random:
+        candidates = random_candidates(args.random, args.seed)
+    else:
+        candidates = grid_candidates(_parse_grid(args.grid) if args.grid else DEFAULT_GRID)
+
+    started = time.perf_counter()
+    report = tune(
+        args.files,
+        zones,
+        candidates,
+        parse_overrides(args.set),
+        switch_weight=args.switch_weight,
+        short_cycle_weight=args.short_cycle_weight,
+        workers=args.workers,
+        short_cycle=args.short_cycle,
+    )
+    print(f"{len(candidates)} candidates in {time.perf_counter() - started:.1f}s")
+
+    for zone, result in report.items():
+        metrics = result["metrics"]
+        print(
+            f"\n{zone}: {json.dumps(result['recommended'])}\n"
+            f"  {metrics['switches_per_day']:.1f} switches/day, "
+            f"comfort error {metrics['comfort_error']:.2f} °C, "
+            f"{metrics['short_cycles']} short cycles"
+        )
+        print("  Pareto front (switches, comfort error):")
+        for point in result["pareto"]:
+            print(
+                f"    {point['switches']:>6} {point['comfort_error']:>6.2f}  "
+                f"{json.dumps(point['options'])}"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())